@@ -0,0 +1,201 @@
+from fastapi import FastAPI, Request, Response
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Optional, Set
+import asyncio
+import json
+import logging
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+# Events after which a task sends no more notifications
+FINAL_EVENTS = {"completed", "failed", "canceled"}
+# Events that resolve a task's result. "input_required" pauses the task until the client answers, the
+# task's sequence continues when it is resumed and its final event replaces the result.
+RESULT_EVENTS = FINAL_EVENTS | {"input_required"}
+
+
+class NotificationReceiver:
+    """
+    Receives push notifications sent by `A2aMinSubscribeTaskManager` and correlates them with tasks.
+
+    The receiver runs its HTTP endpoint in the caller's event loop. Incoming notifications are parsed
+    and put on a queue, a single consumer drops redelivered events by task id and sequence number and
+    resolves a future per task once the task's result event arrives.
+
+    State is kept for the `max_tasks` most recently notified tasks, older tasks are forgotten as new ones
+    arrive. Terminal notifications wait for `completions()` in a queue of at most `max_completions`,
+    the oldest are dropped once it is full.
+
+    Example:
+        ```python
+        async with NotificationReceiver(port=9000) as receiver:
+            task_id = await client.send_message("Hello", notification_url=receiver.url)
+            result = await receiver.wait_for_result(task_id)
+        ```
+    """
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 9000,
+        path: str = "/notify",
+        public_host: str = "localhost",
+        max_tasks: int = 10_000,
+        max_completions: int = 1000,
+    ):
+        """
+        Args:
+            host: The host to bind the notification endpoint to.
+            port: The port to bind the notification endpoint to.
+            path: The path of the notification endpoint.
+            public_host: The host the server should use to reach the endpoint.
+            max_tasks: The maximum number of tasks to keep seen sequence numbers and results for.
+            max_completions: The maximum number of result notifications waiting for `completions()`.
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+        self.url = f"http://{public_host}:{port}{path}"
+        self.max_tasks = max_tasks
+        self.app = FastAPI()
+        self.app.add_api_route(path, self._on_notification, methods=["POST"])
+
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.duplicates = 0
+        self.dropped_completions = 0
+        self._seen: OrderedDict[str, Set[int]] = OrderedDict()
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._completed: asyncio.Queue = asyncio.Queue(maxsize=max_completions)
+        self._server: Optional[uvicorn.Server] = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def __aenter__(self) -> "NotificationReceiver":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        """Start the notification endpoint and the consumer in the running event loop."""
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._tasks = [
+            asyncio.create_task(self._server.serve()),
+            asyncio.create_task(self._consume()),
+        ]
+        while not self._server.started:
+            if self._tasks[0].done():
+                # Surface bind errors instead of waiting forever
+                await self._tasks[0]
+            await asyncio.sleep(0.05)
+        logger.info(f"Notification receiver listening on {self.url}")
+
+    async def stop(self) -> None:
+        """Stop the notification endpoint and the consumer."""
+        if self._server is not None:
+            self._server.should_exit = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _on_notification(self, request: Request) -> Response:
+        try:
+            notification = json.loads(await request.body())
+        except ValueError:
+            return Response(status_code=400)
+        self.queue.put_nowait(notification)
+        return Response(status_code=202)
+
+    async def _consume(self) -> None:
+        while True:
+            notification = await self.queue.get()
+            try:
+                self._handle(notification)
+            except Exception as e:
+                logger.warning(f"Dropping malformed notification {notification}: {e}")
+
+    def _handle(self, notification: Dict[str, Any]) -> None:
+        task_id = notification["id"]
+        seq = notification["seq"]
+        seen = self._seen.get(task_id)
+        if seen is None:
+            seen = self._seen[task_id] = set()
+            self._evict()
+        else:
+            self._seen.move_to_end(task_id)
+        if seq in seen:
+            self.duplicates += 1
+            return
+        seen.add(seq)
+
+        if notification["event"] not in RESULT_EVENTS:
+            return
+        self.results[task_id] = notification
+        future = self._future(task_id)
+        if not future.done():
+            future.set_result(notification)
+        if self._completed.full():
+            # Nobody is iterating over completions, keep the latest ones
+            self._completed.get_nowait()
+            self.dropped_completions += 1
+        self._completed.put_nowait(notification)
+
+    def _evict(self) -> None:
+        while len(self._seen) > self.max_tasks:
+            task_id, _ = self._seen.popitem(last=False)
+            self.results.pop(task_id, None)
+            future = self._futures.get(task_id)
+            # Pending futures still have waiters
+            if future is not None and future.done():
+                del self._futures[task_id]
+
+    def _future(self, task_id: str) -> asyncio.Future:
+        future = self._futures.get(task_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._futures[task_id] = future
+        return future
+
+    async def wait_for_result(
+        self, task_id: str, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Wait for the result notification of a task, its final event or "input_required".
+
+        Args:
+            task_id: The ID of the task to wait for.
+            timeout: Optional number of seconds to wait before raising `asyncio.TimeoutError`.
+
+        Returns:
+            The result notification of the task.
+        """
+        if task_id in self.results:
+            return self.results[task_id]
+        # Shield the shared future so a timed out waiter doesn't cancel it for other waiters
+        return await asyncio.wait_for(asyncio.shield(self._future(task_id)), timeout)
+
+    async def completions(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over result notifications in the order they arrive, starting with the ones that
+        arrived while nobody was iterating, up to `max_completions` of them.
+
+        Yields:
+            The result notification of each task, one per final or "input_required" event.
+        """
+        while True:
+            yield await self._completed.get()
+
+    def forget(self, task_id: str) -> None:
+        """
+        Drop all state kept for a task once its result has been consumed.
+
+        Args:
+            task_id: The ID of the task to forget.
+        """
+        self._seen.pop(task_id, None)
+        self._futures.pop(task_id, None)
+        self.results.pop(task_id, None)
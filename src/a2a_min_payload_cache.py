@@ -0,0 +1,99 @@
+from a2a_min.base.types import Task, TaskState
+from pydantic import BaseModel
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict
+import orjson
+
+
+def dumps(model: BaseModel) -> bytes:
+    """Serialize a pydantic model to compact JSON bytes, dropping unset optional fields."""
+    return orjson.dumps(model.model_dump(mode="json", exclude_none=True))
+
+
+@dataclass
+class _CachedTask:
+    # Serialized task keyed by the length of its (possibly trimmed) history
+    tasks: Dict[int, bytes] = field(default_factory=dict)
+    # Serialized artifacts keyed by their position in `task.artifacts`
+    artifacts: Dict[int, bytes] = field(default_factory=dict)
+
+
+class SerializedPayloadCache:
+    """
+    Caches the JSON bytes of completed tasks and their artifacts.
+
+    A completed task is serialized once and the bytes are reused by push notifications, `tasks/get`
+    responses and stream events. Only completed tasks are cached, entries are dropped when the task
+    is updated and the least recently used tasks are evicted beyond `max_tasks`.
+    """
+
+    def __init__(self, max_tasks: int = 1024):
+        """
+        Args:
+            max_tasks: The maximum number of tasks to keep serialized payloads for.
+        """
+        self.max_tasks = max_tasks
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, _CachedTask] = OrderedDict()
+
+    def invalidate(self, task_id: str) -> None:
+        """
+        Drop the cached payloads of a task.
+
+        Args:
+            task_id: The ID of the updated task.
+        """
+        self._entries.pop(task_id, None)
+
+    def task_bytes(self, task: Task) -> bytes:
+        """
+        Get the serialized task.
+
+        Args:
+            task: The task to serialize, with its history already trimmed for the response.
+        """
+        history_length = len(task.history or [])
+        entry = self._entry(task)
+        if entry is None:
+            return dumps(task)
+        payload = entry.tasks.get(history_length)
+        if payload is None:
+            self.misses += 1
+            payload = entry.tasks[history_length] = dumps(task)
+        else:
+            self.hits += 1
+        return payload
+
+    def artifact_bytes(self, task: Task, index: int) -> bytes:
+        """
+        Get a serialized artifact of a task.
+
+        Args:
+            task: The task the artifact belongs to.
+            index: The position of the artifact in `task.artifacts`.
+        """
+        entry = self._entry(task)
+        if entry is None:
+            return dumps(task.artifacts[index])
+        payload = entry.artifacts.get(index)
+        if payload is None:
+            self.misses += 1
+            payload = entry.artifacts[index] = dumps(task.artifacts[index])
+        else:
+            self.hits += 1
+        return payload
+
+    def _entry(self, task: Task) -> _CachedTask | None:
+        if task.status.state != TaskState.COMPLETED:
+            return None
+        entry = self._entries.get(task.id)
+        if entry is None:
+            entry = self._entries[task.id] = _CachedTask()
+            if len(self._entries) > self.max_tasks:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(task.id)
+        return entry
@@ -1,7 +1,13 @@
 from typing import override, Optional, List
 from uuid import uuid4
 from a2a_min import A2aMinClient
-from a2a_min.base.types import Task, Message, TextPart, TaskSendParams
+from a2a_min.base.types import (
+    Task,
+    Message,
+    TextPart,
+    TaskSendParams,
+    PushNotificationConfig,
+)
 from asyncio import create_task
 
 
@@ -16,6 +22,7 @@ class A2aMinSubscribeClient(A2aMinClient):
         session_id: Optional[str] = None,
         task_id: Optional[str] = None,
         accepted_output_modes: Optional[List[str]] = None,
+        notification_url: Optional[str] = None,
     ) -> Task:
         """Send a message to the agent and get a response.
 
@@ -24,6 +31,8 @@ class A2aMinSubscribeClient(A2aMinClient):
             session_id: An optional session ID. If not provided, a new one will be generated.
             task_id: An optional task ID. If not provided, a new one will be generated.
             accepted_output_modes: Optional list of accepted output modes.
+            notification_url: Optional callback url, e.g. `NotificationReceiver.url`. Registered
+                together with the task so no notification is missed.
 
         Returns:
             A Task object containing the agent's response.
@@ -35,7 +44,7 @@ class A2aMinSubscribeClient(A2aMinClient):
             task_id = uuid4().hex
 
         if accepted_output_modes is None:
-            accepted_output_modes = ["text"]
+            accepted_output_modes = ["text", "data"]
 
         message_obj = Message(role="user", parts=[TextPart(text=message)])
 
@@ -44,6 +53,11 @@ class A2aMinSubscribeClient(A2aMinClient):
             sessionId=session_id,
             message=message_obj,
             acceptedOutputModes=accepted_output_modes,
+            pushNotification=(
+                None
+                if notification_url is None
+                else PushNotificationConfig(url=notification_url)
+            ),
         )
 
         # Non-blocking call to create a new task
@@ -0,0 +1,166 @@
+from a2a_min import AgentAdapter, A2aMinServer, Middleware
+from a2a_min.base.server.server import A2AServer
+from a2a_min.base.server.task_manager import TaskManager
+from a2a_min.base.types import (
+    GetTaskResponse,
+    SendTaskStreamingResponse,
+    TaskArtifactUpdateEvent,
+    TaskState,
+)
+from a2a_min_payload_cache import dumps
+from a2a_min_subscribe_task_manager import (
+    A2aMinSharedSubscribeTaskManager,
+    A2aMinSubscribeTaskManager,
+)
+from a2a_min_task_store import SqliteTaskStore
+from a2a_min_workers import serve_workers
+from sse_starlette.sse import EventSourceResponse
+from starlette.responses import Response
+
+from typing import Any, AsyncIterable, Callable, Optional, List
+import orjson
+
+
+class A2ACachedPayloadServer(A2AServer):
+    """
+    An A2A server that writes completed tasks and artifacts using the serialized payloads cached by
+    `A2aMinSubscribeTaskManager`, instead of dumping the pydantic models on every request.
+    """
+
+    def _create_response(self, result: Any):
+        if isinstance(result, GetTaskResponse) and result.result is not None:
+            cache = self.task_manager.payload_cache
+            body = {"jsonrpc": "2.0", "result": orjson.Fragment(cache.task_bytes(result.result))}
+            if result.id is not None:
+                body["id"] = result.id
+            return Response(orjson.dumps(body), media_type="application/json")
+        if isinstance(result, AsyncIterable):
+            return EventSourceResponse(self._cached_events(result))
+        return super()._create_response(result)
+
+    async def _cached_events(self, events: AsyncIterable[SendTaskStreamingResponse]):
+        async for item in events:
+            yield {"data": self._event_bytes(item).decode()}
+
+    def _event_bytes(self, item: SendTaskStreamingResponse) -> bytes:
+        event = item.result
+        if not isinstance(event, TaskArtifactUpdateEvent):
+            return dumps(item)
+        task = self.task_manager.tasks.get(event.id)
+        if task is None or task.status.state != TaskState.COMPLETED:
+            return dumps(item)
+        for position, artifact in enumerate(task.artifacts or []):
+            if artifact.index == event.artifact.index:
+                result = event.model_dump(mode="json", exclude_none=True, exclude={"artifact"})
+                result["artifact"] = orjson.Fragment(
+                    self.task_manager.payload_cache.artifact_bytes(task, position)
+                )
+                body = {"jsonrpc": "2.0", "result": result}
+                if item.id is not None:
+                    body["id"] = item.id
+                return orjson.dumps(body)
+        return dumps(item)
+
+
+class A2AMinSubscribeServer(A2aMinServer):
+    """
+    Updates the from_agent function to use the custom task manager.
+    """
+    def __init__(
+        self,
+        server: A2AServer,
+        task_manager: TaskManager,
+        middlewares: Optional[List[Middleware]] = None,
+    ):
+        super().__init__(
+            server=server, task_manager=task_manager, middlewares=middlewares
+        )
+
+    @classmethod
+    def from_agent(
+        cls,
+        agent: AgentAdapter,
+        host: str = "localhost",
+        port: int = 8000,
+        middlewares: Optional[List[Middleware]] = None,
+        block_without_push: bool = False,
+        store: Optional[SqliteTaskStore] = None,
+        default_deadline_s: Optional[float] = None,
+    ) -> "A2aMinServer":
+        """Create a server from an agent.
+
+        Args:
+            agent: The agent to serve.
+            host: The host to bind to.
+            port: The port to bind to.
+            middlewares: Optional list of middleware to apply.
+            block_without_push: If True, tasks sent without a push notification config are
+                run to completion before `tasks/send` returns.
+            store: Optional task store shared with other worker processes.
+            default_deadline_s: Optional time budget in seconds for tasks sent without one.
+
+        Returns:
+            An A2aMinServer instance configured with the agent.
+        """
+        url = f"http://{host}:{port}/"
+        agent_card = agent.get_agent_card(url)
+        if store is None:
+            task_manager = A2aMinSubscribeTaskManager(
+                agent,
+                block_without_push=block_without_push,
+                default_deadline_s=default_deadline_s,
+            )
+        else:
+            task_manager = A2aMinSharedSubscribeTaskManager(
+                agent,
+                store,
+                block_without_push=block_without_push,
+                default_deadline_s=default_deadline_s,
+            )
+
+        server = A2ACachedPayloadServer(
+            agent_card=agent_card, task_manager=task_manager, host=host, port=port
+        )
+
+        return cls(server, task_manager, middlewares)
+
+    @classmethod
+    def start_workers(
+        cls,
+        agent_factory: Callable[[], AgentAdapter],
+        workers: int,
+        host: str = "localhost",
+        port: int = 8000,
+        middlewares: Optional[List[Middleware]] = None,
+        block_without_push: bool = False,
+        store_path: str = "a2a_tasks.sqlite3",
+        default_deadline_s: Optional[float] = None,
+    ) -> None:
+        """Serve an agent from several worker processes sharing one port and one task store.
+
+        Args:
+            agent_factory: Builds the agent. Called once in each worker process.
+            workers: The number of worker processes.
+            host: The host to bind to.
+            port: The port to bind to.
+            middlewares: Optional list of middleware to apply.
+            block_without_push: If True, tasks sent without a push notification config are
+                run to completion before `tasks/send` returns.
+            store_path: The path of the SQLite file the workers share task state through.
+            default_deadline_s: Optional time budget in seconds for tasks sent without one.
+        """
+        store = SqliteTaskStore(store_path)
+        serve_workers(
+            lambda: cls.from_agent(
+                agent_factory(),
+                host=host,
+                port=port,
+                middlewares=middlewares,
+                block_without_push=block_without_push,
+                store=store,
+                default_deadline_s=default_deadline_s,
+            )._server,
+            host=host,
+            port=port,
+            workers=workers,
+        )
@@ -1,28 +1,158 @@
 from a2a_min.task_manager import A2aMinTaskManager
 from a2a_min.base.types import (
+    CancelTaskRequest,
+    CancelTaskResponse,
+    InvalidParamsError,
     SendTaskRequest,
     SendTaskResponse,
+    SendTaskStreamingRequest,
+    SendTaskStreamingResponse,
+    JSONRPCResponse,
+    Message,
+    Task,
+    TaskArtifactUpdateEvent,
     TaskStatus,
+    TaskStatusUpdateEvent,
     TaskState,
+    TextPart,
     Artifact,
     PushNotificationConfig
 )
 from a2a_min.agent_adapter import AgentAdapter
+from a2a_min_payload_cache import SerializedPayloadCache
+from a2a_min_task_store import SharedTaskStoreMixin, SqliteTaskStore
+from tracing import Span, current_span, extract, get_tracer
 
+from collections.abc import AsyncIterable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
 import asyncio
 import httpx
+import inspect
 import logging
+import math
+import orjson
+import threading
 import time
 
 logger = logging.getLogger(__name__)
+tracer = get_tracer("a2a_server")
+
+# Events after which a task sends no more notifications, an "input_required" task continues its sequence
+FINAL_EVENTS = {"completed", "failed", "canceled"}
+
+
+@dataclass
+class TaskRun:
+    """
+    Per-task handle passed to agents that implement `invoke_task`.
+
+    `invocation` is the asyncio task running the agent, `invoke_task`/`invoke` for `tasks/send` and
+    `stream` for `tasks/sendSubscribe`. Cancelling the run cancels it.
+
+    Agents use it to report progress while the task is running and to find out when the task was
+    cancelled. `report` and `cancel_event` are thread safe, so they can be used from worker threads
+    such as a crew kickoff running in `asyncio.to_thread`. Events reported once the run is finished or
+    cancelled are dropped, they would follow the task's final notification.
+
+    The run of the task being handled is also available through `current_task_run`, e.g. for
+    streaming agents that are called without one.
+    """
+    task_id: str
+    session_id: str
+    loop: asyncio.AbstractEventLoop
+    on_progress: Callable[[str, str, Dict[str, Any]], None]
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    invocation: Optional[asyncio.Task] = None
+    deadline: Optional[float] = None
+    span: Optional[Span] = None
+    finished: bool = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the task's deadline, or None without a deadline."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def report(self, event: str, **data: Any) -> None:
+        """
+        Report a progress event for the task.
+
+        Args:
+            event: The name of the event, e.g. "headlines_ready".
+            **data: Small JSON serializable fields describing the event.
+        """
+        self.loop.call_soon_threadsafe(self._deliver, event, data)
+
+    def _deliver(self, event: str, data: Dict[str, Any]) -> None:
+        # Runs in the event loop, in order with the final notification
+        if not self.finished and not self.cancelled:
+            self.on_progress(self.task_id, event, data)
+
+
+current_task_run: ContextVar[Optional[TaskRun]] = ContextVar("current_task_run", default=None)
 
 
 class A2aMinSubscribeTaskManager(A2aMinTaskManager):
     """
     A custom task manager that extends the default task manager to support task notifications.
+
+    Notifications are posted to the task's callback url as JSON objects of the form
+    `{"id": task_id, "seq": n, "event": name, "data": {...}}`. Sequence numbers start at 0 and
+    increase by one per task, so receivers can order and dedupe redelivered events. The final
+    event is "completed", "failed" or "canceled"; "completed" also carries the artifact.
+    "input_required" pauses the task until the client answers, its sequence continues when the
+    task is resumed.
+
+    Each task gets a deadline from the `deadline_s` field of the request metadata, or
+    `default_deadline_s`. Agents find it on the task run and are expected to return what they have
+    by then.
+
+    Running tasks are cancelled by `tasks/cancel` and when a streaming client disconnects before the
+    final event. Cancellation sets the run's cancel event, so agents can stop their outbound calls,
+    and `cancelled_runs` counts the cancellations by reason.
+
+    Completed tasks are serialized once into `payload_cache` and the bytes are shared by
+    notifications, `tasks/get` responses and stream events.
+
+    Each run is traced in an "a2a_server.task" span, continuing the trace context sent in the
+    `traceparent` field of the request metadata. The span is the current span while the agent runs.
     """
-    def __init__(self, agent: AgentAdapter):
+    def __init__(
+        self,
+        agent: AgentAdapter,
+        block_without_push: bool = False,
+        default_deadline_s: Optional[float] = None,
+    ):
+        """
+        Args:
+            agent: The agent to run tasks with.
+            block_without_push: If True, tasks sent without a push notification config are run
+                to completion before the send task response is returned.
+            default_deadline_s: Optional time budget in seconds for tasks sent without one.
+        """
         super().__init__(agent)
+        self.block_without_push = block_without_push
+        self.default_deadline_s = default_deadline_s
+        self.notification_seqs: Dict[str, int] = {}
+        self.notification_locks: Dict[str, asyncio.Lock] = {}
+        self.payload_cache = SerializedPayloadCache()
+        self.runs: Dict[str, TaskRun] = {}
+        self.cancelled_runs: Dict[str, int] = {}
+        self._http_client: Optional[httpx.AsyncClient] = None
+
+    async def update_store(
+        self, task_id: str, status: TaskStatus, artifacts: Optional[List[Artifact]]
+    ) -> Task:
+        """Update a task and drop its cached payloads."""
+        task = await super().update_store(task_id, status, artifacts)
+        self.payload_cache.invalidate(task_id)
+        return task
 
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
         """Handle a send task request.
@@ -33,89 +163,374 @@ class A2aMinSubscribeTaskManager(A2aMinTaskManager):
         Returns:
             A response containing the result of the task.
         """
+        error = self._deadline_error(request)
+        if error is not None:
+            return SendTaskResponse(id=request.id, error=error)
         # Add the task to the store
         await self.upsert_task(request.params)
-        print(f"In send task {time.time()}")
         task = await self.update_store(
             request.params.id, TaskStatus(state=TaskState.SUBMITTED), None
         )
-        print(f"In send task {self.tasks}")
+        # Register the callback sent along with the task, so no early events are missed
+        if request.params.pushNotification is not None:
+            await self.set_push_notification_info(
+                request.params.id, request.params.pushNotification
+            )
+        elif self.block_without_push:
+            task = await self.start_task(request)
+            task_result = self.append_task_history(task, request.params.historyLength)
+            return SendTaskResponse(id=request.id, result=task_result)
+
         # Non-blocking call to start the task
         asyncio.create_task(self.start_task(request))
         return SendTaskResponse(id=request.id, result=task)
-      
 
-    async def start_task(self, request: SendTaskRequest) -> None:
+    async def start_task(self, request: SendTaskRequest) -> Task:
         """
         Starts the task by calling the agent's invoke method.
-        Once the task is complete the result is sent to the client's notification
-        url.
+        Progress reported by the agent and the final result are sent to the client's
+        notification url.
+
+        Returns:
+            The task after it has finished.
         """
-        logger.info(f"Starting task {request.params.id}")
+        task_id = request.params.id
+        logger.info(f"Starting task {task_id}")
         # Update task status to Working
-        await self.update_store(
-            request.params.id, TaskStatus(state=TaskState.WORKING), None
-        )
+        await self.update_store(task_id, TaskStatus(state=TaskState.WORKING), None)
         # Get the user query
         query = self._get_user_query(request.params)
-        
-        # Call the agent's invoke method
-        try:
-            agent_result = await self.agent.invoke(query, request.params.sessionId)
 
-            artifact = None
-            task_status = None
+        run = self._new_task_run(request)
+        current_task_run.set(run)
+        current_span.set(run.span)
+        run.invocation = asyncio.create_task(
+            self._invoke_agent(query, request.params.sessionId, run)
+        )
+        self.runs[task_id] = run
+        try:
+            agent_result = await self._await_invocation(run)
+        except asyncio.CancelledError as e:
+            if not run.cancelled:
+                # The caller went away, stop the agent as well
+                run.cancel_event.set()
+                run.invocation.cancel()
+                run.span.end(e)
+                raise
+            return self.tasks[task_id]
+        except Exception as e:
+            if run.cancelled:
+                return self.tasks[task_id]
+            logger.error(f"Error invoking agent for task {task_id}: {e}")
+            run.span.end(e)
+            self.schedule_notification(task_id, "failed", {"error": str(e)})
+            return await self.update_store(
+                task_id, TaskStatus(state=TaskState.FAILED), None
+            )
+        finally:
+            run.finished = True
+            self.runs.pop(task_id, None)
+            run.span.end()
 
-            if agent_result.requires_input:
-                task_status = TaskStatus(
-                    state=TaskState.INPUT_REQUIRED, message=agent_result.message
-                )
-            else:
-                task_status = TaskStatus(state=TaskState.COMPLETED)
-                artifact = Artifact(parts=agent_result.message.parts)
-            
-            # Update task status
+        if agent_result.requires_input:
             task = await self.update_store(
-                request.params.id, task_status, None if artifact is None else [artifact]
+                task_id,
+                TaskStatus(state=TaskState.INPUT_REQUIRED, message=agent_result.message),
+                None,
             )
-            
-            # Append task history
-            task_result = self.append_task_history(task, request.params.historyLength)
-            # Get the notification config
-            notif_config = await self.get_push_notification_info(request.params.id)
-            if notif_config:
-                # Send the notification
-                await self.send_notification(request.params.id, artifact)
-            else:
-                return SendTaskResponse(id=request.id, result=task_result)
+            self.schedule_notification(
+                task_id, "input_required", {"message": agent_result.message.model_dump()}
+            )
+            return task
 
-        except Exception as e:
-            logger.error(f"Error invoking agent: {e}")
-            raise ValueError(f"Error invoking agent: {e}")
+        artifact = Artifact(parts=agent_result.message.parts)
+        task = await self.update_store(
+            task_id, TaskStatus(state=TaskState.COMPLETED), [artifact]
+        )
+        self.schedule_notification(
+            task_id,
+            "completed",
+            {},
+            self.payload_cache.artifact_bytes(task, len(task.artifacts) - 1),
+        )
+        return task
+
+    def _deadline_error(
+        self, request: Union[SendTaskRequest, SendTaskStreamingRequest]
+    ) -> Optional[InvalidParamsError]:
+        """The error to respond with if the request's `deadline_s` is not a positive number."""
+        deadline_s = (request.params.metadata or {}).get("deadline_s")
+        if deadline_s is None:
+            return None
+        try:
+            valid = not isinstance(deadline_s, bool) and 0 < float(deadline_s) < math.inf
+        except (TypeError, ValueError):
+            valid = False
+        if valid:
+            return None
+        return InvalidParamsError(
+            message=f"deadline_s must be a positive number of seconds, got {deadline_s!r}"
+        )
 
-    async def send_notification(self, task_id: str, artifact: Artifact):
+    def _new_task_run(
+        self, request: Union[SendTaskRequest, SendTaskStreamingRequest]
+    ) -> TaskRun:
+        metadata = request.params.metadata or {}
+        deadline_s = metadata.get("deadline_s", self.default_deadline_s)
+        return TaskRun(
+            task_id=request.params.id,
+            session_id=request.params.sessionId,
+            loop=asyncio.get_running_loop(),
+            on_progress=self.schedule_notification,
+            deadline=None if deadline_s is None else time.monotonic() + float(deadline_s),
+            span=tracer.start_span(
+                "a2a_server.task",
+                extract(metadata),
+                task_id=request.params.id,
+                streaming=isinstance(request, SendTaskStreamingRequest),
+            ),
+        )
+
+    async def _await_invocation(self, run: TaskRun):
+        """Wait for the agent invocation of a run to finish."""
+        return await run.invocation
+
+    async def cancel_run(self, run: TaskRun, reason: str) -> Task:
         """
-        Send a notification update to the client for a given task.
+        Cancel a running task and notify the client, through its callback url and the task's
+        event stream, if it has one.
 
         Args:
-            task_id (str): The ID of the task to send a notification for.
-            artifact (Artifact): The artifact to send in the notification.
-        """
-        notif_config = await self.get_push_notification_info(task_id)
-        url = notif_config.url
-        # Send a push notification to the user
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                response = await client.post(
-                    url, json=artifact.model_dump(), headers=None
+            run (TaskRun): The run of the task to cancel.
+            reason (str): Why the task was cancelled, e.g. "tasks/cancel" or "disconnect".
+
+        Returns:
+            The cancelled task.
+        """
+        run.cancel_event.set()
+        if run.invocation is not None:
+            run.invocation.cancel()
+        self.runs.pop(run.task_id, None)
+        run.span.set(cancelled=reason)
+        run.span.end(asyncio.CancelledError())
+        self.cancelled_runs[reason] = self.cancelled_runs.get(reason, 0) + 1
+        logger.info(f"Cancelled task {run.task_id} ({reason}), cancelled so far: {self.cancelled_runs}")
+        status = TaskStatus(state=TaskState.CANCELED)
+        task = await self.update_store(run.task_id, status, None)
+        self.schedule_notification(run.task_id, "canceled", {"reason": reason})
+        await self.enqueue_events_for_sse(
+            run.task_id, TaskStatusUpdateEvent(id=run.task_id, status=status, final=True)
+        )
+        return task
+
+    async def on_cancel_task(self, request: CancelTaskRequest) -> CancelTaskResponse:
+        """Cancel a running task, tasks that already finished can't be cancelled.
+
+        Args:
+            request: The cancel task request.
+        """
+        run = self.runs.get(request.params.id)
+        if run is None:
+            return await super().on_cancel_task(request)
+        task = await self.cancel_run(run, "tasks/cancel")
+        return CancelTaskResponse(id=request.id, result=self.append_task_history(task, None))
+
+    async def on_send_task_subscribe(
+        self, request: SendTaskStreamingRequest
+    ) -> Union[AsyncIterable[SendTaskStreamingResponse], JSONRPCResponse]:
+        """Handle a streaming send task request, cancelling the task if the client disconnects.
+
+        Args:
+            request: The streaming send task request.
+        """
+        error = self._deadline_error(request)
+        if error is not None:
+            return JSONRPCResponse(id=request.id, error=error)
+        run = self._new_task_run(request)
+        self.runs[run.task_id] = run
+        # Streaming agents are called without the run, they can find it here
+        current_task_run.set(run)
+        current_span.set(run.span)
+        response = await super().on_send_task_subscribe(request)
+        if not isinstance(response, AsyncIterable):
+            self.runs.pop(run.task_id, None)
+            run.span.end()
+            return response
+        return self._cancel_on_disconnect(run, response)
+
+    async def _run_streaming_agent(self, request: SendTaskStreamingRequest):
+        """
+        Run the streaming agent, as the cancellable invocation of the task's run.
+
+        Each result updates the store and is queued for the stream. The final result, or the error
+        the agent raised, also ends the task in the store and is sent to the task's callback url.
+        """
+        task_id = request.params.id
+        run = self.runs.get(task_id)
+        if run is not None:
+            run.invocation = asyncio.current_task()
+        try:
+            query = self._get_user_query(request.params)
+            async for agent_result in self.agent.stream(query, request.params.sessionId):
+                artifact = None
+                if agent_result.requires_input:
+                    status = TaskStatus(state=TaskState.INPUT_REQUIRED, message=agent_result.message)
+                elif agent_result.is_complete:
+                    status = TaskStatus(state=TaskState.COMPLETED, message=agent_result.message)
+                    artifact = Artifact(parts=agent_result.message.parts, index=0, append=False)
+                else:
+                    status = TaskStatus(state=TaskState.WORKING, message=agent_result.message)
+                final = status.state != TaskState.WORKING
+                if final and run is not None:
+                    run.finished = True
+                task = await self.update_store(
+                    task_id, status, None if artifact is None else [artifact]
                 )
-                response.raise_for_status()
-                logger.info(f"Push-notification sent for URL: {url}")
-            except Exception as e:
-                logger.warning(
-                    f"Error during sending push-notification for URL {url}: {e}"
+                if artifact is not None:
+                    self.schedule_notification(
+                        task_id,
+                        "completed",
+                        {},
+                        self.payload_cache.artifact_bytes(task, len(task.artifacts) - 1),
+                    )
+                    await self.enqueue_events_for_sse(
+                        task_id, TaskArtifactUpdateEvent(id=task_id, artifact=artifact)
+                    )
+                elif final:
+                    self.schedule_notification(
+                        task_id, "input_required", {"message": agent_result.message.model_dump()}
+                    )
+                await self.enqueue_events_for_sse(
+                    task_id, TaskStatusUpdateEvent(id=task_id, status=status, final=final)
                 )
-    
+                if final:
+                    return
+        except Exception as e:
+            if run is not None:
+                if run.cancelled:
+                    return
+                run.finished = True
+                run.span.end(e)
+            logger.error(f"Error streaming task {task_id}: {e}")
+            status = TaskStatus(
+                state=TaskState.FAILED,
+                message=Message(role="agent", parts=[TextPart(text=f"Error: {e}")]),
+            )
+            await self.update_store(task_id, status, None)
+            self.schedule_notification(task_id, "failed", {"error": str(e)})
+            await self.enqueue_events_for_sse(
+                task_id, TaskStatusUpdateEvent(id=task_id, status=status, final=True)
+            )
+
+    async def _cancel_on_disconnect(
+        self, run: TaskRun, events: AsyncIterable[SendTaskStreamingResponse]
+    ):
+        finished = False
+        try:
+            async for event in events:
+                finished = finished or bool(getattr(event.result, "final", False))
+                yield event
+        finally:
+            # The response stops iterating early when the client disconnects
+            if not finished and not run.cancelled:
+                # Stop the agent right away, the store update can't be awaited while closing
+                run.cancel_event.set()
+                if run.invocation is not None:
+                    run.invocation.cancel()
+                asyncio.create_task(self.cancel_run(run, "disconnect"))
+            else:
+                run.finished = True
+                self.runs.pop(run.task_id, None)
+                run.span.end()
+
+    async def _invoke_agent(self, query: str, session_id: str, run: TaskRun):
+        """
+        Invoke the agent, passing the task run to agents that accept one.
+        Supports both sync and async `invoke` implementations.
+        """
+        if hasattr(self.agent, "invoke_task"):
+            return await self.agent.invoke_task(query, session_id, run)
+        agent_result = self.agent.invoke(query, session_id)
+        if inspect.isawaitable(agent_result):
+            agent_result = await agent_result
+        return agent_result
+
+    def schedule_notification(
+        self,
+        task_id: str,
+        event: str,
+        data: Dict[str, Any],
+        artifact: Optional[bytes] = None,
+    ) -> None:
+        """
+        Assign the next sequence number to an event and post it in the background.
+        Events of a task are delivered in sequence order.
+
+        Args:
+            task_id (str): The ID of the task the event belongs to.
+            event (str): The name of the event.
+            data (dict): Event specific fields.
+            artifact (bytes): Optional serialized artifact to attach to the event.
+        """
+        seq = self.notification_seqs.get(task_id, 0)
+        payload = {"id": task_id, "seq": seq, "event": event, "data": data}
+        if artifact is not None:
+            payload["artifact"] = orjson.Fragment(artifact)
+        if event in FINAL_EVENTS:
+            # Drop the task's entries, the lock still orders this post after the pending ones
+            self.notification_seqs.pop(task_id, None)
+            lock = self.notification_locks.pop(task_id, None) or asyncio.Lock()
+        else:
+            self.notification_seqs[task_id] = seq + 1
+            lock = self.notification_locks.setdefault(task_id, asyncio.Lock())
+        asyncio.create_task(
+            self._post_in_order(lock, task_id, event, orjson.dumps(payload))
+        )
+
+    async def _post_in_order(
+        self, lock: asyncio.Lock, task_id: str, event: str, payload: bytes
+    ):
+        # asyncio.Lock wakes waiters in FIFO order, so posts keep their scheduling order
+        async with lock:
+            notif_config = await self.lookup_push_notification_info(task_id)
+            if notif_config is None:
+                logger.debug(f"No callback for task {task_id}, dropping {event}")
+                return
+            await self.send_notification(notif_config.url, event, payload)
+
+    async def lookup_push_notification_info(
+        self, task_id: str
+    ) -> Optional[PushNotificationConfig]:
+        """
+        Get the push notification config of a task without waiting for it to be registered.
+
+        Args:
+            task_id (str): The ID of the task.
+        """
+        return self.push_notification_infos.get(task_id)
+
+    async def send_notification(self, url: str, event: str, payload: bytes):
+        """
+        Send a serialized notification to a client's callback url.
+
+        Args:
+            url (str): The notification url of the client.
+            event (str): The name of the event, used for logging.
+            payload (bytes): The JSON encoded notification to send.
+        """
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(timeout=10)
+        try:
+            response = await self._http_client.post(
+                url, content=payload, headers={"Content-Type": "application/json"}
+            )
+            response.raise_for_status()
+            logger.info(f"Push-notification {event} sent for URL: {url}")
+        except Exception as e:
+            logger.warning(
+                f"Error during sending push-notification for URL {url}: {e}"
+            )
+
     async def set_push_notification_info(self, task_id: str, notification_config: PushNotificationConfig):
         """
         Set the push notification information for a given task.
@@ -161,4 +576,69 @@ class A2aMinSubscribeTaskManager(A2aMinTaskManager):
                 raise ValueError(f"Task: {task_id} not found.")
 
             return self.push_notification_infos[task_id]
-            
\ No newline at end of file
+
+
+class A2aMinSharedSubscribeTaskManager(SharedTaskStoreMixin, A2aMinSubscribeTaskManager):
+    """
+    The subscribe task manager backed by a shared task store, for multi-worker servers.
+    """
+    def __init__(
+        self,
+        agent: AgentAdapter,
+        store: SqliteTaskStore,
+        block_without_push: bool = False,
+        default_deadline_s: Optional[float] = None,
+    ):
+        """
+        Args:
+            agent: The agent to run tasks with.
+            store: The task store shared by all workers.
+            block_without_push: If True, tasks sent without a push notification config are run
+                to completion before the send task response is returned.
+            default_deadline_s: Optional time budget in seconds for tasks sent without one.
+        """
+        super().__init__(
+            agent,
+            block_without_push=block_without_push,
+            default_deadline_s=default_deadline_s,
+        )
+        self.store = store
+        self.remote_versions: Dict[str, int] = {}
+        self.cancel_poll_interval = 1.0
+
+    def _on_remote_task(self, task: Task, version: int) -> None:
+        # Cached payloads of a task owned by another worker are stale once its version moves on
+        if self.remote_versions.get(task.id) != version:
+            self.remote_versions[task.id] = version
+            self.payload_cache.invalidate(task.id)
+
+    async def _run_streaming_agent(self, request: SendTaskStreamingRequest):
+        run = self.runs.get(request.params.id)
+        if run is None:
+            return await super()._run_streaming_agent(request)
+        watcher = asyncio.create_task(self._watch_cancel_requests(run))
+        try:
+            await super()._run_streaming_agent(request)
+        finally:
+            # A watcher that is cancelling the run has to finish ending the stream
+            if not run.cancelled:
+                watcher.cancel()
+
+    async def _watch_cancel_requests(self, run: TaskRun):
+        """Cancel a streaming run once another worker records a cancel request for it."""
+        while not run.cancelled:
+            await asyncio.sleep(self.cancel_poll_interval)
+            if not run.cancelled and await asyncio.to_thread(
+                self.store.cancel_requested, run.task_id
+            ):
+                await self.cancel_run(run, "tasks/cancel")
+
+    async def _await_invocation(self, run: TaskRun):
+        # Cancel requests for this task may arrive at other workers, poll the store for them
+        while True:
+            done, _ = await asyncio.wait({run.invocation}, timeout=self.cancel_poll_interval)
+            if done:
+                return run.invocation.result()
+            if await asyncio.to_thread(self.store.cancel_requested, run.task_id):
+                await self.cancel_run(run, "tasks/cancel")
+                return await run.invocation
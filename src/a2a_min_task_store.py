@@ -0,0 +1,279 @@
+from a2a_min.agent_adapter import AgentAdapter
+from a2a_min.base.types import (
+    CancelTaskRequest,
+    CancelTaskResponse,
+    GetTaskRequest,
+    GetTaskResponse,
+    PushNotificationConfig,
+    Task,
+    TaskNotCancelableError,
+    TaskNotFoundError,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    Artifact,
+)
+from a2a_min.task_manager import A2aMinTaskManager
+
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS push_configs (
+    id TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cancel_requests (
+    id TEXT PRIMARY KEY,
+    requested REAL NOT NULL
+);
+"""
+
+
+class SqliteTaskStore:
+    """
+    A task store shared by the worker processes of a server through a local SQLite file.
+
+    Workers keep serving the tasks they own from memory and write every update through to the store,
+    so `tasks/get`, `tasks/cancel` and callback registration can be answered by any worker.
+    Each process opens its own connection lazily, so a store can be created before workers fork.
+    """
+
+    def __init__(self, path: str = "a2a_tasks.sqlite3"):
+        """
+        Args:
+            path: The path of the SQLite database file.
+        """
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def put_task(self, task: Task) -> int:
+        """
+        Insert or replace a task.
+
+        Args:
+            task: The task to store.
+
+        Returns:
+            The new version of the task.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                (version,) = conn.execute(
+                    "INSERT INTO tasks (id, version, body, updated) VALUES (?, 1, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET version = version + 1, "
+                    "body = excluded.body, updated = excluded.updated RETURNING version",
+                    (task.id, task.model_dump_json(exclude_none=True), time.time()),
+                ).fetchone()
+            return version
+
+    def get_task(self, task_id: str) -> Optional[Tuple[Task, int]]:
+        """
+        Get a task and its version.
+
+        Args:
+            task_id: The ID of the task.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT body, version FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return Task.model_validate_json(row[0]), row[1]
+
+    def has_task(self, task_id: str) -> bool:
+        """
+        Check whether a task exists.
+
+        Args:
+            task_id: The ID of the task.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT 1 FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+        return row is not None
+
+    def put_push_config(self, task_id: str, config: PushNotificationConfig) -> None:
+        """
+        Store the push notification config of a task.
+
+        Args:
+            task_id: The ID of the task.
+            config: The push notification config.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO push_configs (id, body) VALUES (?, ?)",
+                    (task_id, config.model_dump_json(exclude_none=True)),
+                )
+
+    def get_push_config(self, task_id: str) -> Optional[PushNotificationConfig]:
+        """
+        Get the push notification config of a task.
+
+        Args:
+            task_id: The ID of the task.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT body FROM push_configs WHERE id = ?", (task_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return PushNotificationConfig.model_validate_json(row[0])
+
+    def request_cancel(self, task_id: str) -> None:
+        """
+        Record a request to cancel a task, for the worker running it to pick up.
+
+        Args:
+            task_id: The ID of the task.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cancel_requests (id, requested) VALUES (?, ?)",
+                    (task_id, time.time()),
+                )
+
+    def cancel_requested(self, task_id: str) -> bool:
+        """
+        Check whether cancelling a task has been requested.
+
+        Args:
+            task_id: The ID of the task.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT 1 FROM cancel_requests WHERE id = ?", (task_id,)
+            ).fetchone()
+        return row is not None
+
+
+class SharedTaskStoreMixin:
+    """
+    Task manager mixin that writes tasks and push notification configs through to a `SqliteTaskStore`
+    and answers requests for tasks owned by other workers from it.
+
+    Must come before the task manager class in the bases and set `self.store`.
+    """
+
+    store: SqliteTaskStore
+    tasks: Dict[str, Task]
+    push_notification_infos: Dict[str, PushNotificationConfig]
+
+    async def upsert_task(self, task_send_params: TaskSendParams) -> Task:
+        task = await super().upsert_task(task_send_params)
+        await asyncio.to_thread(self.store.put_task, task)
+        return task
+
+    async def update_store(
+        self, task_id: str, status: TaskStatus, artifacts: Optional[List[Artifact]]
+    ) -> Task:
+        task = await super().update_store(task_id, status, artifacts)
+        await asyncio.to_thread(self.store.put_task, task)
+        return task
+
+    async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
+        if request.params.id in self.tasks:
+            return await super().on_get_task(request)
+        found = await asyncio.to_thread(self.store.get_task, request.params.id)
+        if found is None:
+            return GetTaskResponse(id=request.id, error=TaskNotFoundError())
+        task, version = found
+        self._on_remote_task(task, version)
+        task_result = self.append_task_history(task, request.params.historyLength)
+        return GetTaskResponse(id=request.id, result=task_result)
+
+    async def on_cancel_task(self, request: CancelTaskRequest) -> CancelTaskResponse:
+        if request.params.id in self.tasks:
+            return await super().on_cancel_task(request)
+        found = await asyncio.to_thread(self.store.get_task, request.params.id)
+        if found is None:
+            return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
+        task, _ = found
+        if not hasattr(self, "cancel_run") or task.status.state not in (
+            TaskState.SUBMITTED,
+            TaskState.WORKING,
+        ):
+            return CancelTaskResponse(id=request.id, error=TaskNotCancelableError())
+        # The worker running the task picks the request up and cancels it
+        await asyncio.to_thread(self.store.request_cancel, request.params.id)
+        return CancelTaskResponse(id=request.id, result=self.append_task_history(task, None))
+
+    async def set_push_notification_info(
+        self, task_id: str, notification_config: PushNotificationConfig
+    ):
+        if task_id not in self.tasks and not await asyncio.to_thread(
+            self.store.has_task, task_id
+        ):
+            raise ValueError(f"Task: {task_id} not found.")
+        await asyncio.to_thread(self.store.put_push_config, task_id, notification_config)
+        self.push_notification_infos[task_id] = notification_config
+
+    async def get_push_notification_info(self, task_id: str) -> PushNotificationConfig:
+        notif_config = await self.lookup_push_notification_info(task_id)
+        if notif_config is None:
+            raise ValueError(f"Task: {task_id} has no push notification config.")
+        return notif_config
+
+    async def lookup_push_notification_info(
+        self, task_id: str
+    ) -> Optional[PushNotificationConfig]:
+        """
+        Get the push notification config of a task, which may have been registered with another worker.
+
+        Args:
+            task_id (str): The ID of the task.
+        """
+        notif_config = self.push_notification_infos.get(task_id)
+        if notif_config is None:
+            notif_config = await asyncio.to_thread(self.store.get_push_config, task_id)
+            if notif_config is not None:
+                self.push_notification_infos[task_id] = notif_config
+        return notif_config
+
+    def _on_remote_task(self, task: Task, version: int) -> None:
+        """Hook called with tasks read from the store that are owned by another worker."""
+
+
+class A2aMinSharedTaskManager(SharedTaskStoreMixin, A2aMinTaskManager):
+    """
+    The default task manager backed by a shared task store, for multi-worker servers.
+    """
+
+    def __init__(self, agent: AgentAdapter, store: SqliteTaskStore):
+        """
+        Args:
+            agent: The agent to run tasks with.
+            store: The task store shared by all workers.
+        """
+        super().__init__(agent)
+        self.store = store
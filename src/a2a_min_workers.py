@@ -0,0 +1,63 @@
+from a2a_min.base.server.server import A2AServer
+
+from typing import Callable
+import logging
+import multiprocessing
+import socket
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+
+def serve_workers(
+    build_server: Callable[[], A2AServer],
+    host: str = "localhost",
+    port: int = 8000,
+    workers: int = 2,
+) -> None:
+    """
+    Run a server in several worker processes that accept connections on one shared port.
+
+    The socket is bound once in the parent and inherited by forked workers, the kernel spreads the
+    incoming connections between them. Each worker builds its own server, so state shared between
+    workers has to live in a shared store such as `SqliteTaskStore`.
+
+    Args:
+        build_server: Builds the A2A server to run in a worker, e.g. the `_server` of an
+            `A2aMinServer`. Called once in each worker process.
+        host: The host to bind to.
+        port: The port to bind to.
+        workers: The number of worker processes.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # Fork so the builder doesn't have to be picklable and the socket is inherited
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_run_worker, args=(build_server, sock), name=f"a2a-worker-{i}")
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Serving on http://{host}:{port}/ with {workers} workers")
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+    finally:
+        sock.close()
+
+
+def _run_worker(build_server: Callable[[], A2AServer], sock: socket.socket) -> None:
+    server = build_server()
+    config = uvicorn.Config(server.app, log_level="info")
+    uvicorn.Server(config).run(sockets=[sock])
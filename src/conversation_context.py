@@ -0,0 +1,195 @@
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Token budget for the recent turns sent along with each general chat message
+CONTEXT_TOKEN_BUDGET = 3000
+# Turns pushed out of the budget are folded into the rolling summary once they add up to this many tokens
+SUMMARY_BATCH_TOKENS = 500
+# Approximate length the rolling summary is kept to
+SUMMARY_MAX_WORDS = 250
+# Evicted turns kept while the summary can't be updated, the oldest are dropped beyond this many tokens
+SUMMARY_MAX_PENDING_TOKENS = 2000
+# Sessions whose context is kept, the least recently active are dropped first
+MAX_SESSIONS = 1000
+
+
+def count_tokens(text: str) -> int:
+    """
+    Roughly count the tokens of a text, about four characters per token.
+
+    Args:
+        text (str): The text to count.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return len(text) // 4 + 1
+
+
+class ConversationContext:
+    """
+    The context of one chat session: the most recent turns within a token budget, and a rolling summary
+    of the older turns.
+
+    Turns pushed out of the budget wait in `evicted` until they add up to `SUMMARY_BATCH_TOKENS`, and are
+    then folded into the existing summary with one call, so the summary is updated incrementally rather
+    than recomputed from the whole transcript. Until then they are still sent as they are. While the
+    summary can't be updated they are kept up to `max_pending_tokens`.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        summary_batch_tokens: int = SUMMARY_BATCH_TOKENS,
+        max_pending_tokens: int = SUMMARY_MAX_PENDING_TOKENS,
+    ):
+        """
+        Args:
+            token_budget (int): Token budget for the recent turns and the summary.
+            summary_batch_tokens (int): Tokens of evicted turns to collect before updating the summary.
+            max_pending_tokens (int): Tokens of evicted turns to keep while the summary can't be updated.
+        """
+        self.token_budget = token_budget
+        self.summary_batch_tokens = summary_batch_tokens
+        self.max_pending_tokens = max_pending_tokens
+        self.turns: deque[tuple[dict[str, str], int]] = deque()
+        self.turn_tokens = 0
+        self.evicted: list[tuple[dict[str, str], int]] = []
+        self.evicted_tokens = 0
+        self.summary = ""
+        self._summary_lock = asyncio.Lock()
+
+    def add_turn(self, user_message: str, response: str):
+        """
+        Record a user message and the response to it, evicting the oldest turns beyond the budget.
+
+        Args:
+            user_message (str): The user's message.
+            response (str): The response shown to the user.
+        """
+        for message in (
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": response},
+        ):
+            tokens = count_tokens(message["content"])
+            self.turns.append((message, tokens))
+            self.turn_tokens += tokens
+
+        budget = self.token_budget - count_tokens(self.summary)
+        # Always keep the latest exchange, even if it alone exceeds the budget
+        while self.turn_tokens > budget and len(self.turns) > 2:
+            message, tokens = self.turns.popleft()
+            self.turn_tokens -= tokens
+            self.evicted.append((message, tokens))
+            self.evicted_tokens += tokens
+
+    def build_messages(self, user_message: str) -> tuple[list[dict[str, str]], int]:
+        """
+        Build the messages to send for a new user message.
+
+        Args:
+            user_message (str): The user's new message.
+
+        Returns:
+            tuple: (messages, estimated prompt tokens)
+        """
+        messages = []
+        tokens = 0
+        if self.summary:
+            messages.append(
+                {"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"}
+            )
+            tokens += count_tokens(self.summary)
+        for message, message_tokens in (*self.evicted, *self.turns):
+            messages.append(message)
+            tokens += message_tokens
+        messages.append({"role": "user", "content": user_message})
+        return messages, tokens + count_tokens(user_message)
+
+    async def update_summary(self, complete: Callable[[list[dict[str, str]]], Awaitable[str]]):
+        """
+        Fold the evicted turns into the rolling summary, once enough of them have been collected.
+
+        Args:
+            complete (Callable): Returns the completion of chat messages, raises if it can't.
+        """
+        if self.evicted_tokens < self.summary_batch_tokens:
+            return
+        async with self._summary_lock:
+            if self.evicted_tokens < self.summary_batch_tokens:
+                # Folded in by the update that held the lock
+                return
+            # The turns stay in the prompt until the summary covering them is in place
+            evicted = list(self.evicted)
+            transcript = "\n".join(f"{m['role']}: {m['content']}" for m, _ in evicted)
+            try:
+                summary = await complete(
+                    [
+                        {
+                            "role": "user",
+                            "content": (
+                                "Update the summary of a conversation with the turns that followed it. "
+                                f"Keep the facts, names and open questions, in at most {SUMMARY_MAX_WORDS} words. "
+                                "Reply with the updated summary only.\n\n"
+                                f"Summary:\n{self.summary or '(empty)'}\n\nNew turns:\n{transcript}"
+                            ),
+                        }
+                    ]
+                )
+            except Exception as e:
+                logger.warning(f"Could not update the conversation summary: {e}")
+                # Try again after the next turn, without letting the pending turns grow unbounded
+                while self.evicted_tokens > self.max_pending_tokens:
+                    _, tokens = self.evicted.pop(0)
+                    self.evicted_tokens -= tokens
+                return
+            # Turns evicted during the call wait for the next update
+            del self.evicted[: len(evicted)]
+            self.evicted_tokens -= sum(tokens for _, tokens in evicted)
+            self.summary = summary
+
+
+class Conversations:
+    """
+    The contexts of the most recently active chat sessions.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        """
+        Args:
+            max_sessions (int): Sessions whose context is kept, the least recently active are dropped first.
+        """
+        self.max_sessions = max_sessions
+        self._contexts: OrderedDict[str, ConversationContext] = OrderedDict()
+
+    def get(self, session_id: str) -> ConversationContext:
+        """
+        Get the context of a chat session, creating it on first use.
+
+        Args:
+            session_id (str): The Gradio session hash.
+
+        Returns:
+            ConversationContext: The session's context.
+        """
+        context = self._contexts.get(session_id)
+        if context is None:
+            context = self._contexts[session_id] = ConversationContext()
+            if len(self._contexts) > self.max_sessions:
+                self._contexts.popitem(last=False)
+        else:
+            self._contexts.move_to_end(session_id)
+        return context
+
+    def drop(self, session_id: str) -> None:
+        """
+        Drop the context of a chat session.
+
+        Args:
+            session_id (str): The Gradio session hash.
+        """
+        self._contexts.pop(session_id, None)
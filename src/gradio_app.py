@@ -1,11 +1,17 @@
 import gradio as gr
-import json
 from openai import AsyncOpenAI
 
+from conversation_context import ConversationContext, Conversations
 from news_riddle_client import AINewsRiddleClient
+from rate_limiter import estimate_tokens, get_limiter, is_rate_limited
+from riddle_topics import asks_for_riddle, guess_topic, same_topic
+from tracing import Span, current_span, get_tracer
 from dotenv import load_dotenv
 from logging import getLogger
+from uuid import uuid4
+import asyncio
 import logging
+import time
 
 logging.basicConfig(level=logging.WARNING)  # or INFO, or ERROR
 
@@ -14,12 +20,204 @@ logger = getLogger(__name__)
 # Load environment variables from .env file
 load_dotenv()
 OPENAI_MODEL = "gpt-4.1"
+# Time budget for riddle tasks, the server returns fewer or recent riddles rather than exceeding it
+RIDDLE_DEADLINE_S = 30.0
 
 # Riddle server endpoint (assuming it's running locally)
 RIDDLE_SERVER_URL = "http://localhost:8000/"  # Adjust if needed
 logger.warning("Getting the Agent Card!")
 client = AINewsRiddleClient.connect(RIDDLE_SERVER_URL)
-openai_client = AsyncOpenAI()
+# No retries in the SDK, they would bypass the limiter and its backoff on throttling
+openai_client = AsyncOpenAI(max_retries=0)
+# Shares the OpenAI quota with any crew running in this process
+openai_limiter = get_limiter("openai")
+tracer = get_tracer("gradio_app")
+
+conversations = Conversations()
+# Keeps the background summary updates referenced until they finish
+summary_updates: set[asyncio.Task] = set()
+
+
+def log_prompt_tokens(usage, estimated: int | None = None):
+    """
+    Report the prompt tokens of an OpenAI call.
+
+    Args:
+        usage: The usage reported by OpenAI, if any.
+        estimated (int): Optional estimate made before the call.
+    """
+    if usage is None:
+        return
+    message = f"Prompt tokens: {usage.prompt_tokens}"
+    if estimated is not None:
+        message += f" (estimated {estimated})"
+    logger.warning(message)
+
+
+# Start riddle tasks on a local guess of the topic while the topic is extracted
+SPECULATIVE_RIDDLES = True
+
+
+class SpeculationStats:
+    """
+    Hit rate of speculative riddle tasks, the extraction time they hid and the riddle work they wasted.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.hidden_s = 0.0
+        self.wasted_s = 0.0
+
+    def record(self, hit: bool, seconds: float):
+        """
+        Record the outcome of a speculative riddle task.
+
+        Args:
+            hit (bool): Whether the task was kept.
+            seconds (float): On a hit the topic extraction time, on a miss how long the task ran before it was cancelled.
+        """
+        if hit:
+            self.hits += 1
+            self.hidden_s += seconds
+        else:
+            self.misses += 1
+            self.wasted_s += seconds
+        total = self.hits + self.misses
+        logger.warning(
+            f"Speculative riddle {'hit' if hit else 'miss'}: hit rate {self.hits / total:.0%} "
+            f"({self.hits}/{total}), {self.hidden_s:.1f}s of topic extraction hidden, "
+            f"{self.wasted_s:.1f}s of riddle work wasted"
+        )
+
+
+speculation_stats = SpeculationStats()
+# Keeps the background cancels of speculative riddle tasks referenced until they finish
+speculation_cancels: set[asyncio.Task] = set()
+
+
+class RiddleSpeculation:
+    """
+    A riddle task started on a guessed topic before the topic is extracted.
+    """
+
+    def __init__(self, guess: str, stream: bool, trace_parent: Span | None = None):
+        """
+        Args:
+            guess (str): The guessed topic.
+            stream (bool): Whether to start a streaming task, whose updates are buffered until the guess is confirmed.
+            trace_parent (Span): Optional span to trace the task under, defaults to the current span.
+        """
+        self.guess = guess
+        self.task_id = uuid4().hex
+        self.started = time.monotonic()
+        self.trace_parent = trace_parent
+        self.updates: asyncio.Queue = asyncio.Queue()
+        if stream:
+            self.future = asyncio.create_task(self._buffer_updates())
+        else:
+            self.future = asyncio.create_task(
+                client.send_message(
+                    guess,
+                    task_id=self.task_id,
+                    deadline_s=RIDDLE_DEADLINE_S,
+                    trace_parent=trace_parent,
+                )
+            )
+
+    async def _buffer_updates(self):
+        try:
+            async for update in client.send_message_streaming(
+                self.guess,
+                task_id=self.task_id,
+                deadline_s=RIDDLE_DEADLINE_S,
+                trace_parent=self.trace_parent,
+            ):
+                self.updates.put_nowait(update)
+        finally:
+            self.updates.put_nowait(None)
+
+    async def stream(self):
+        """
+        Yields the task's updates, the buffered ones first.
+        """
+        while (update := await self.updates.get()) is not None:
+            yield update
+        # Surface the error the stream ended with, if any
+        await self.future
+
+    async def cancel(self) -> float:
+        """
+        Cancel the task, locally and on the riddle server.
+
+        Returns:
+            float: How long the task ran.
+        """
+        self.future.cancel()
+        try:
+            # The request that started the task may not have reached the server yet
+            await client.cancel_task(self.task_id, wait_for_task_s=1.0)
+        except Exception as e:
+            logger.warning(f"Could not cancel speculative riddle task {self.task_id}: {e}")
+        return time.monotonic() - self.started
+
+    def cancel_in_background(self, miss: bool = False):
+        """
+        Cancel the task without waiting for the riddle server to confirm it.
+
+        Args:
+            miss (bool): Whether the guess missed the topic, records the wasted work once cancelled.
+        """
+        cancel = asyncio.create_task(self.cancel())
+        speculation_cancels.add(cancel)
+        cancel.add_done_callback(speculation_cancels.discard)
+        if miss:
+            def record_miss(done: asyncio.Task):
+                if not done.cancelled():
+                    speculation_stats.record(False, done.result())
+
+            cancel.add_done_callback(record_miss)
+
+
+async def extract_riddle_topic(
+    message: str, stream: bool, trace_parent: Span | None = None
+) -> tuple[str, RiddleSpeculation | None]:
+    """
+    Extracts the topic of a riddle request, speculatively starting the riddle task on a guessed topic
+    in the meantime.
+
+    Args:
+        message (str): The user's input message.
+        stream (bool): Whether the riddles will be streamed.
+        trace_parent (Span): Optional span to trace the extraction and the task under, defaults to the current span.
+
+    Returns:
+        tuple: (topic, speculation) where speculation is the task to continue on if the guess matched
+            the topic, otherwise None. The topic is empty if no riddle was requested.
+    """
+    guess = guess_topic(message) if SPECULATIVE_RIDDLES else ""
+    # The speculative task outlives the extraction, it's traced next to it rather than under it
+    trace_parent = trace_parent or current_span.get()
+    with tracer.span("gradio.extract_topic", trace_parent) as span:
+        if not guess:
+            return await is_riddle_request(message), None
+
+        speculation = RiddleSpeculation(guess, stream, trace_parent)
+        try:
+            topic = await is_riddle_request(message)
+        except BaseException:
+            speculation.cancel_in_background()
+            raise
+        if topic.startswith("[OpenAI API error"):
+            # The guess is the best topic there is
+            topic = guess
+        if same_topic(topic, guess):
+            span.set(speculation="hit")
+            speculation_stats.record(True, time.monotonic() - speculation.started)
+            return topic, speculation
+        span.set(speculation="miss")
+        speculation.cancel_in_background(miss=True)
+        return topic, None
 
 
 # Helper: Detect if user is asking for a riddle
@@ -34,9 +232,8 @@ async def is_riddle_request(message: str) -> str:
     Returns:
         str: The extracted topic if a riddle is requested, otherwise an empty string.
     """
-    triggers = ["riddle", "puzzle", "give me a riddle", "ai riddle"]
     # Check if any trigger word is present in the message
-    if any(trigger in message.lower() for trigger in triggers):
+    if asks_for_riddle(message):
         extract_topic_message = [
             {
                 "role": "user",
@@ -73,107 +270,192 @@ async def get_riddle_from_server(message: str):
         return f"[Could not reach riddle server: {e}]"
 
 
-async def stream_openai_response(messages: list[dict[str, str]]):
+async def stream_openai_response(
+    messages: list[dict[str, str]], estimated: int | None = None, trace_parent: Span | None = None
+):
     """
     Streams a response from the OpenAI API for the given messages.
 
     Args:
         messages (list): List of message dicts for OpenAI chat completion.
+        estimated (int): Optional estimate of the prompt tokens, reported next to the actual count.
+        trace_parent (Span): Optional span to trace the call under, defaults to the current span.
 
     Yields:
         str: Partial responses as they are received from OpenAI.
     """
+    # Started explicitly, the current span can't be held across the yields of a generator
+    span = tracer.start_span("openai.chat_stream", trace_parent, model=OPENAI_MODEL)
     try:
-        # Request streaming chat completion from OpenAI
-        response = await openai_client.chat.completions.create(
-            model=OPENAI_MODEL, messages=messages, stream=True
-        )
-        async for chunk in response:
-            if chunk and len(chunk.choices) > 0:
-                yield chunk.choices[0].delta.content  # Yield each part of the response
+        async with openai_limiter.alimit(estimate_tokens(messages)) as permit:
+            try:
+                # Request streaming chat completion from OpenAI
+                response = await openai_client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=messages,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                async for chunk in response:
+                    # Latency is measured to the first chunk
+                    permit.ok()
+                    if chunk and len(chunk.choices) > 0:
+                        yield chunk.choices[0].delta.content  # Yield each part of the response
+                    elif chunk and chunk.usage:
+                        # The last chunk carries the usage of the whole call
+                        log_prompt_tokens(chunk.usage, estimated)
+            except Exception as e:
+                permit.failed(throttled=is_rate_limited(e))
+                raise
     except Exception as e:
+        span.end(e)
         yield f"[OpenAI API error: {e}]"
+    finally:
+        span.end()
+
+
+async def request_openai_completion(
+    messages: list[dict[str, str]], estimated: int | None = None
+) -> str:
+    """
+    Gets a non-streaming response from the OpenAI API for the given messages, raising on errors.
+
+    Args:
+        messages (list): List of message dicts for OpenAI chat completion.
+        estimated (int): Optional estimate of the prompt tokens, reported next to the actual count.
+
+    Returns:
+        str: The response content from OpenAI.
+    """
+    with tracer.span("openai.chat", model=OPENAI_MODEL):
+        async with openai_limiter.alimit(estimate_tokens(messages)) as permit:
+            try:
+                # Request a single chat completion from OpenAI
+                completion = await openai_client.chat.completions.create(
+                    model=OPENAI_MODEL, messages=messages, stream=False
+                )
+            except Exception as e:
+                permit.failed(throttled=is_rate_limited(e))
+                raise
+            permit.ok(completion.usage.total_tokens if completion.usage else None)
+    log_prompt_tokens(completion.usage, estimated)
+    return completion.choices[0].message.content.strip()
 
 
 # Call OpenAI GPT-4.1-nano
-async def get_openai_response(messages: list[dict[str, str]]):
+async def get_openai_response(messages: list[dict[str, str]], estimated: int | None = None):
     """
     Gets a non-streaming response from the OpenAI API for the given messages.
 
     Args:
         messages (list): List of message dicts for OpenAI chat completion.
+        estimated (int): Optional estimate of the prompt tokens, reported next to the actual count.
 
     Returns:
         str: The response content from OpenAI, or an error message.
     """
     try:
-        # Request a single chat completion from OpenAI
-        completion = await openai_client.chat.completions.create(
-            model=OPENAI_MODEL, messages=messages, stream=False
-        )
-        return completion.choices[0].message.content.strip()
+        return await request_openai_completion(messages, estimated)
     except Exception as e:
         return f"[OpenAI API error: {e}]"
 
 
-async def chatbot_fn(message, history):
+async def chatbot_fn(message, context: ConversationContext):
     """
     Main chatbot logic to handle user messages, determining if a riddle is requested or if a general AI response is needed.
 
     Args:
         message (str): The user's input message.
-        history (list): The chat history (not used in logic, but available for future use).
+        context (ConversationContext): The session's context, sent along with general messages.
 
     Returns:
         tuple: (response text, task_id, session_id) if a riddle, otherwise (response, None, None).
     """
-    topic = await is_riddle_request(message)
-    logger.warning("Creating a new task!")
-    if topic:
-        # If a riddle is requested, send the topic to the riddle server
-        task = await client.send_message(topic)
-        logger.warning(f"Created Task : {task}")
-        if task.artifacts:
-            artifact = task.artifacts[-1]
-            part = artifact.parts[-1]
-            if hasattr(part, "text"):
-                response = part.text
-        return response, task.id, task.sessionId
-    else:
-        # Otherwise, get a general response from OpenAI
-        response = await get_openai_response([{"role": "user", "content": message}])
-        return response, None, None
+    with tracer.span("gradio.chat"):
+        topic, speculation = await extract_riddle_topic(message, stream=False)
+        logger.warning("Creating a new task!")
+        if topic:
+            # If a riddle is requested, continue on the speculative task or send the topic to the riddle server
+            if speculation:
+                try:
+                    task = await speculation.future
+                except asyncio.CancelledError:
+                    speculation.cancel_in_background()
+                    raise
+            else:
+                task = await client.send_message(topic, deadline_s=RIDDLE_DEADLINE_S)
+            logger.warning(f"Created Task : {task}")
+            response = "[Riddle server error: No artifacts]"
+            if task.artifacts:
+                artifact = task.artifacts[-1]
+                part = artifact.parts[-1]
+                if hasattr(part, "data"):
+                    response = format_riddle(part.data)
+                elif hasattr(part, "text"):
+                    response = part.text
+            return response, task.id, task.sessionId
+        else:
+            # Otherwise, get a general response from OpenAI
+            messages, estimated = context.build_messages(message)
+            response = await get_openai_response(messages, estimated)
+            return response, None, None
 
 
-async def stream_chatbot_fn(message):
+async def stream_chatbot_fn(message, context: ConversationContext):
     """
     Handles streaming chatbot responses, either from the riddle server or OpenAI, 
     depending on the user's request.
 
     Args:
         message (str): The user's input message.
+        context (ConversationContext): The session's context, sent along with general messages.
 
     Yields:
         str: Partial responses as they are received.
     """
-    topic = await is_riddle_request(message)
-    if topic:
-        logger.warning("Creating a new task!")
-        # Stream updates from the riddle server
-        async for update in client.send_message_streaming(topic):
-            if update.artifact and update.artifact.parts:
-                artifact = update.artifact.parts[0]
-                if artifact and hasattr(artifact, "text") and update.status:
-                    if update.is_final:
-                        yield ""  # End of stream
-                        break
-                    yield artifact.text
-    else:
-        # Stream responses from OpenAI
-        async for partial_response in stream_openai_response(
-            [{"role": "user", "content": message}]
-        ):
-            yield partial_response
+    # Started explicitly, the current span can't be held across the yields of a generator
+    span = tracer.start_span("gradio.stream_chat")
+    speculation = None
+    # Whether the riddle task was read up to its final update
+    finished = False
+    try:
+        topic, speculation = await extract_riddle_topic(message, stream=True, trace_parent=span)
+        if topic:
+            logger.warning("Creating a new task!")
+            if speculation:
+                updates = speculation.stream()
+            else:
+                updates = client.send_message_streaming(
+                    topic, deadline_s=RIDDLE_DEADLINE_S, trace_parent=span
+                )
+            # Stream updates from the riddle server, one riddle per update
+            async for update in updates:
+                if update.artifact and update.artifact.parts:
+                    part = update.artifact.parts[0]
+                    if part and update.status:
+                        if update.is_final:
+                            finished = True
+                            yield ""  # End of stream
+                            break
+                        if hasattr(part, "data"):
+                            yield format_riddle(part.data) + "\n\n"
+                        elif hasattr(part, "text"):
+                            yield part.text
+        else:
+            # Stream responses from OpenAI
+            messages, estimated = context.build_messages(message)
+            async for partial_response in stream_openai_response(
+                messages, estimated, trace_parent=span
+            ):
+                yield partial_response
+    except BaseException as e:
+        span.end(e)
+        raise
+    finally:
+        if speculation and not finished and not speculation.future.done():
+            # The consumer stopped early, don't leave the task running on the server
+            speculation.cancel_in_background()
+        span.end()
 
 def format_riddle(riddles: dict):
     """
@@ -198,7 +480,7 @@ with gr.Blocks() as demo:
     clear = gr.Button("Clear")
     do_stream = gr.Checkbox(label="Stream response", value=False)
 
-    async def respond(user_message, chat_history, do_stream):
+    async def respond(user_message, chat_history, do_stream, request: gr.Request):
         """
         Handles the response logic for the Gradio UI, supporting both streaming and non-streaming modes.
 
@@ -206,34 +488,33 @@ with gr.Blocks() as demo:
             user_message (str): The user's input message.
             chat_history (list): The chat history as a list of [user, bot] pairs.
             do_stream (bool): Whether to stream the response or not.
+            request (gr.Request): The Gradio request, identifies the session.
 
         Yields:
             tuple: (empty string for textbox, updated chat history)
         """
         task_id = None
         session_id = None
+        context = conversations.get(request.session_hash)
 
         if do_stream:
             # Stream the chatbot response and update the chat history incrementally
             response = ""
-            async for partial_response in stream_chatbot_fn(user_message):
+            async for partial_response in stream_chatbot_fn(user_message, context):
                 if partial_response:
                     response += partial_response
                     chat_history_display = chat_history + [[user_message, response]]
                     yield "", chat_history_display         
         else:
             # Get the full chatbot response
-            response, task_id, session_id = await chatbot_fn(user_message, chat_history)
-            
-        try:
-            # Attempt to parse the response as JSON and format it if possible
-            response = response.strip()
-            response = json.loads(response)
-            response = format_riddle(response)
-        except Exception as e:
-            logger.error(f"Failed to parse response as json: {e}")
-            print(response)
-        
+            response, task_id, session_id = await chatbot_fn(user_message, context)
+
+        context.add_turn(user_message, response)
+        # Summarize older turns in the background, off the response path
+        update = asyncio.create_task(context.update_summary(request_openai_completion))
+        summary_updates.add(update)
+        update.add_done_callback(summary_updates.discard)
+
         if task_id and session_id:
             # If a riddle was generated, include task and session IDs
             response = f"Task ID: {task_id}, Session ID: {session_id}\n{response}"
@@ -241,7 +522,13 @@ with gr.Blocks() as demo:
         chat_history_display = chat_history + [[user_message, response]]
         yield "", chat_history_display
 
+    def clear_chat(request: gr.Request):
+        """Clears the chat and the session's context."""
+        conversations.drop(request.session_hash)
+        return "", []
+
     msg.submit(respond, [msg, chatbot, do_stream], [msg, chatbot])
-    clear.click(lambda: ("", []), None, [msg, chatbot])
+    clear.click(clear_chat, None, [msg, chatbot])
 
-demo.launch(share=True)
+if __name__ == "__main__":
+    demo.launch(share=True)
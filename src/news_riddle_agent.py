@@ -1,19 +1,136 @@
+from functools import cached_property
+from typing import Callable, Optional
+import time
+
 from crewai import Agent, Crew, LLM, Task
+from crewai.tasks.task_output import TaskOutput
 from crewai_tools import SerperDevTool
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
+from news_riddle_models import (
+    AINewsHeadlines,
+    AINewsRiddle,
+    RunGuard,
+    WorkSaved,
+)
+from pydantic import PrivateAttr
+from rate_limiter import RateLimitTimeout, estimate_tokens, get_limiter, is_rate_limited
+from tracing import get_tracer
+
+tracer = get_tracer("riddle_crew")
+
+
+class RateLimitedLLM(LLM):
+    """
+    An LLM whose calls go through the process-wide "openai" limiter, shared by all crews.
+    Each call is traced in an "llm.call" span, including the wait for the limiter.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Passed on to the OpenAI client by litellm, its retries would bypass the limiter.
+        # crewai retries a failed task, and each retry takes a new permit.
+        kwargs.setdefault("max_retries", 0)
+        super().__init__(*args, **kwargs)
+
+    def call(self, messages, *args, **kwargs):
+        with tracer.span("llm.call", model=self.model) as span:
+            limiter = get_limiter("openai")
+            queued = time.perf_counter()
+            try:
+                permit = limiter.acquire(estimate_tokens(messages), self._acquire_timeout())
+            except RateLimitTimeout:
+                self._before_call()
+                raise
+            span.set(queued_s=round(time.perf_counter() - queued, 4))
+            try:
+                self._before_call()
+                result = super().call(messages, *args, **kwargs)
+                permit.ok()
+                return result
+            except Exception as e:
+                if is_rate_limited(e):
+                    permit.failed(throttled=True)
+                raise
+            finally:
+                limiter.release(permit)
+
+    def _acquire_timeout(self) -> Optional[float]:
+        """How long to wait for the limiter, None to wait as long as it takes."""
+        return None
 
+    def _before_call(self) -> None:
+        """Called right before the completion call is made."""
 
-class AINewsHeadlines(BaseModel):
-    headlines: list[str] = Field(description="List of headlines")
-    descriptions: list[str] = Field(description="List of descriptions")
-    dates: list[str] = Field(description="List of dates")
 
+class GuardedLLM(RateLimitedLLM):
+    """An LLM that consults a `RunGuard` before every call."""
+
+    def __init__(self, *args, guard: RunGuard, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.guard = guard
+
+    def _acquire_timeout(self) -> Optional[float]:
+        remaining = self.guard.remaining()
+        return None if remaining is None else max(0.0, remaining)
+
+    def _before_call(self) -> None:
+        self.guard.check("skipped_llm_calls")
+        remaining = self.guard.remaining()
+        if remaining is not None:
+            # Passed on to the completion call, so a slow model can't outlive the run
+            self.timeout = remaining
+
+
+class RateLimitedSerperDevTool(SerperDevTool):
+    """
+    A Serper search tool whose searches go through the process-wide "serper" limiter.
+    Each search is traced in a "serper.search" span, including the wait for the limiter.
+    """
+
+    def _run(self, **kwargs):
+        with tracer.span("serper.search") as span:
+            limiter = get_limiter("serper")
+            queued = time.perf_counter()
+            try:
+                permit = limiter.acquire(timeout=self._acquire_timeout())
+            except RateLimitTimeout:
+                self._before_call()
+                raise
+            span.set(queued_s=round(time.perf_counter() - queued, 4))
+            try:
+                self._before_call()
+                result = super()._run(**kwargs)
+                permit.ok()
+                return result
+            except Exception as e:
+                if is_rate_limited(e):
+                    permit.failed(throttled=True)
+                raise
+            finally:
+                limiter.release(permit)
 
-class AINewsRiddle(BaseModel):
-    riddles: list[str] = Field(description="List of riddles")
-    answers: list[str] = Field(description="List of answers")
-    hints: list[str] = Field(description="List of hints")
+    def _acquire_timeout(self) -> Optional[float]:
+        """How long to wait for the limiter, None to wait as long as it takes."""
+        return None
+
+    def _before_call(self) -> None:
+        """Called right before the search request is made."""
+
+
+class GuardedSerperDevTool(RateLimitedSerperDevTool):
+    """A Serper search tool that consults a `RunGuard` before every search."""
+
+    _guard: RunGuard = PrivateAttr(default_factory=RunGuard)
+
+    def __init__(self, guard: RunGuard, **kwargs):
+        super().__init__(**kwargs)
+        self._guard = guard
+
+    def _acquire_timeout(self) -> Optional[float]:
+        remaining = self._guard.remaining()
+        return None if remaining is None else max(0.0, remaining)
+
+    def _before_call(self) -> None:
+        self._guard.check("skipped_searches")
 
 
 class AINewsRiddleAgent:
@@ -21,12 +138,23 @@ class AINewsRiddleAgent:
     An agent that searches the web for the latest news, given a topic and creates riddles based on them.
     """
 
-    def __init__(self, model_name: str = "gpt-4.1"):
+    def __init__(self, model_name: str = "gpt-4.1", work_saved: Optional[WorkSaved] = None):
         self.model_name = model_name
-        self.web_search_tool = SerperDevTool()
-        self.llm = LLM(model=self.model_name)
+        self.web_search_tool = RateLimitedSerperDevTool()
+        self.llm = RateLimitedLLM(model=self.model_name)
+        self.work_saved = work_saved or WorkSaved()
+
+        self.news_search_agent, self.riddle_agent = self._build_agents(
+            self.llm, self.web_search_tool
+        )
+
+    @cached_property
+    def crew(self) -> Crew:
+        """A crew sharing the agent's LLM and tool, built on first use."""
+        return self.build_crew()
 
-        self.news_search_agent = Agent(
+    def _build_agents(self, llm: LLM, web_search_tool: SerperDevTool) -> tuple[Agent, Agent]:
+        news_search_agent = Agent(
             role="AI News Curator",
             goal=(
                 "Generate a list of the 5 most relevant news updates that have occurred "
@@ -35,11 +163,11 @@ class AINewsRiddleAgent:
             backstory=(
                 "You are a content creator that finds the most interesting and fun news updates."
             ),
-            llm=self.llm,
-            tools=[self.web_search_tool],
+            llm=llm,
+            tools=[web_search_tool],
         )
 
-        self.riddle_agent = Agent(
+        riddle_agent = Agent(
             role="Riddle Creator",
             goal=(
                 "Create a riddles for each of the presented news headlines and descriptions. The answer to the riddle "
@@ -47,14 +175,40 @@ class AINewsRiddleAgent:
                 "Your response for should be a json object with three keys: 'riddles', 'answers', and 'hints'."
             ),
             backstory=("You are an expert at creating fun riddles."),
-            llm=self.llm,
+            llm=llm,
         )
+        return news_search_agent, riddle_agent
+
+    def build_crew(
+        self,
+        task_callback: Optional[Callable[[TaskOutput], None]] = None,
+        guard: Optional[RunGuard] = None,
+    ) -> Crew:
+        """
+        Build a fresh crew for a single run.
+
+        Tasks hold their outputs once executed, so concurrent runs each need their own tasks and crew.
+        Without a guard the agents, tool and LLM are shared. With a guard the run gets its own guarded
+        LLM and search tool, so it can be cancelled without affecting other runs.
+
+        Args:
+            task_callback: Optional callable invoked with the output of each task as it completes.
+            guard: Optional guard checked before every LLM and search call of the run.
+        """
+        if guard is None:
+            news_search_agent, riddle_agent = self.news_search_agent, self.riddle_agent
+        else:
+            llm = GuardedLLM(model=self.model_name, guard=guard)
+            llm.stream = self.llm.stream
+            news_search_agent, riddle_agent = self._build_agents(
+                llm, GuardedSerperDevTool(guard)
+            )
 
         news_search_task = Task(
             description="Generate a list of the 5 most relevant news updates that have occurred in the past 24 hours about {topic},"
             "using the provided web search tool.",
             expected_output="A list of 5 news headlines, descriptions, and dates.",
-            agent=self.news_search_agent,
+            agent=news_search_agent,
             output_pydantic=AINewsHeadlines,
         )
 
@@ -64,16 +218,31 @@ class AINewsRiddleAgent:
                 "The answer to the riddle should be deduced from the headline and description clearly showing how it is based on the latest news."
             ),
             expected_output="A riddle and its answer.",
-            agent=self.riddle_agent,
+            agent=riddle_agent,
             output_pydantic=AINewsRiddle,
         )
 
-        self.crew: Crew = Crew(
-            agents=[self.news_search_agent, self.riddle_agent],
+        return Crew(
+            agents=[news_search_agent, riddle_agent],
             tasks=[news_search_task, riddle_task],
+            task_callback=task_callback,
             verbose=False,
         )
 
+    @staticmethod
+    def limit_riddles(crew: Crew, count: int) -> None:
+        """
+        Ask a crew that hasn't started creating riddles yet for only `count` riddles.
+
+        Args:
+            crew: A crew built by `build_crew`.
+            count: The number of riddles to create.
+        """
+        riddle_task = crew.tasks[-1]
+        riddle_task.description += (
+            f" Create only {count} riddles, for the {count} most relevant headlines."
+        )
+
 
 if __name__ == "__main__":
     # Load environment variables from .env file
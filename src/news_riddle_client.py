@@ -1,8 +1,13 @@
 from a2a_min import A2aMinClient
 from uuid import uuid4
 from typing import Optional, List, AsyncIterable
-from a2a_min.base.types import Message, TextPart, Artifact, TaskSendParams
+from a2a_min.base.types import Message, TextPart, Artifact, Task, TaskNotFoundError, TaskSendParams
 from a2a_min.types import TaskUpdate
+from tracing import Span, get_tracer, inject
+import asyncio
+import time
+
+tracer = get_tracer("a2a_client")
 
 
 class AINewsRiddleClient(A2aMinClient):
@@ -20,24 +25,68 @@ class AINewsRiddleClient(A2aMinClient):
         """
         super().__init__(url)
 
-    async def send_message_streaming(
+    async def send_message(
         self,
         message: str,
         session_id: Optional[str] = None,
         task_id: Optional[str] = None,
         accepted_output_modes: Optional[List[str]] = None,
-    ) -> AsyncIterable[TaskUpdate]:
-        """Send a message to the agent and get a streaming response.
+        deadline_s: Optional[float] = None,
+        trace_parent: Optional[Span] = None,
+    ) -> Task:
+        """Send a message to the agent and wait for the riddles.
 
         Args:
             message: The message to send.
             session_id: An optional session ID. If not provided, a new one will be generated.
             task_id: An optional task ID. If not provided, a new one will be generated.
-            accepted_output_modes: Optional list of accepted output modes.
+            accepted_output_modes: Optional list of accepted output modes. Defaults to text and
+                data, riddles are returned as a data part.
+            deadline_s: Optional time budget in seconds. The server returns fewer or recent
+                riddles rather than exceeding it.
+            trace_parent: Optional span to trace the request under, defaults to the current span.
 
-        Yields:
-            TaskUpdate objects containing parts of the agent's response.
+        Returns:
+            A Task object containing the agent's response.
+        """
+        with tracer.span("a2a_client.send_task", trace_parent) as span:
+            params = self._task_params(
+                message, session_id, task_id, accepted_output_modes, deadline_s, span
+            )
+            span.set(task_id=params.id)
+            response = await self._client.send_task(params)
+            return response.result
+
+    async def cancel_task(self, task_id: str, wait_for_task_s: float = 0.0) -> Optional[Task]:
+        """Cancel a task on the server.
+
+        Args:
+            task_id: The ID of the task to cancel.
+            wait_for_task_s: How long to keep retrying while the server doesn't know the task, e.g.
+                when the request that sent it may still be on its way.
+
+        Returns:
+            The canceled Task, or None if the server couldn't cancel it.
         """
+        give_up = time.monotonic() + wait_for_task_s
+        delay = 0.05
+        while True:
+            response = await self._client.cancel_task({"id": task_id})
+            not_found = response.error is not None and response.error.code == TaskNotFoundError().code
+            if not not_found or time.monotonic() + delay > give_up:
+                return response.result
+            await asyncio.sleep(delay)
+            delay *= 2
+
+    def _task_params(
+        self,
+        message: str,
+        session_id: Optional[str],
+        task_id: Optional[str],
+        accepted_output_modes: Optional[List[str]],
+        deadline_s: Optional[float],
+        span: Optional[Span] = None,
+    ) -> TaskSendParams:
         if session_id is None:
             session_id = uuid4().hex
 
@@ -45,17 +94,61 @@ class AINewsRiddleClient(A2aMinClient):
             task_id = uuid4().hex
 
         if accepted_output_modes is None:
-            accepted_output_modes = ["text"]
+            accepted_output_modes = ["text", "data"]
 
-        message_obj = Message(role="user", parts=[TextPart(text=message)])
+        metadata = {}
+        if deadline_s is not None:
+            metadata["deadline_s"] = deadline_s
+        # Lets the server continue the trace of the request
+        inject(metadata, span)
 
-        params = TaskSendParams(
+        return TaskSendParams(
             id=task_id,
             sessionId=session_id,
-            message=message_obj,
+            message=Message(role="user", parts=[TextPart(text=message)]),
             acceptedOutputModes=accepted_output_modes,
+            metadata=metadata or None,
+        )
+
+    async def send_message_streaming(
+        self,
+        message: str,
+        session_id: Optional[str] = None,
+        task_id: Optional[str] = None,
+        accepted_output_modes: Optional[List[str]] = None,
+        deadline_s: Optional[float] = None,
+        trace_parent: Optional[Span] = None,
+    ) -> AsyncIterable[TaskUpdate]:
+        """Send a message to the agent and get a streaming response.
+
+        Args:
+            message: The message to send.
+            session_id: An optional session ID. If not provided, a new one will be generated.
+            task_id: An optional task ID. If not provided, a new one will be generated.
+            accepted_output_modes: Optional list of accepted output modes.
+            deadline_s: Optional time budget in seconds. The server returns fewer or recent
+                riddles rather than exceeding it.
+            trace_parent: Optional span to trace the request under, defaults to the current span.
+
+        Yields:
+            TaskUpdate objects containing parts of the agent's response.
+        """
+        # Started explicitly, the current span can't be held across the yields of a generator
+        span = tracer.start_span("a2a_client.send_task_streaming", trace_parent)
+        params = self._task_params(
+            message, session_id, task_id, accepted_output_modes, deadline_s, span
         )
+        span.set(task_id=params.id)
+        try:
+            async for update in self._stream_updates(params):
+                yield update
+        except BaseException as e:
+            span.end(e)
+            raise
+        finally:
+            span.end()
 
+    async def _stream_updates(self, params: TaskSendParams) -> AsyncIterable[TaskUpdate]:
         async for update in self._client.send_task_streaming(params):
             if hasattr(update.result, "status"):
                 status_update = update.result
@@ -0,0 +1,104 @@
+from dataclasses import dataclass, field
+from typing import Optional
+import threading
+import time
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class AINewsHeadlines(BaseModel):
+    headlines: list[str] = Field(description="List of headlines")
+    descriptions: list[str] = Field(description="List of descriptions")
+    dates: list[str] = Field(description="List of dates")
+
+
+class AINewsRiddle(BaseModel):
+    riddles: list[str] = Field(description="List of riddles")
+    answers: list[str] = Field(description="List of answers")
+    hints: list[str] = Field(description="List of hints")
+
+    @model_validator(mode="after")
+    def check_lengths(self) -> "AINewsRiddle":
+        if not len(self.riddles) == len(self.answers) == len(self.hints):
+            raise ValueError(
+                f"Got {len(self.riddles)} riddles, {len(self.answers)} answers and {len(self.hints)} hints."
+            )
+        return self
+
+
+class RunCancelled(Exception):
+    """Raised inside a crew run once the run has been cancelled."""
+
+
+class RunDeadlineExceeded(RunCancelled):
+    """Raised inside a crew run once the run's deadline has passed."""
+
+
+@dataclass
+class WorkSaved:
+    """Counts the work skipped because runs were cancelled."""
+    cancelled_runs: int = 0
+    skipped_llm_calls: int = 0
+    skipped_searches: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+
+class RunGuard:
+    """
+    Checked before every outbound LLM and search call of a single crew run.
+
+    Crew runs are blocking and execute in worker threads, so they can't be interrupted directly.
+    Instead the run's LLM and search tool consult the guard, which raises `RunCancelled` once the
+    run's cancel event is set and `RunDeadlineExceeded` once its deadline has passed, so no further
+    model or search quota is spent on it. LLM calls are also given the remaining time as timeout.
+
+    Only the first refused call is counted in `work_saved`. crewai retries a failed task, and each
+    retry hits the guard again without being any further work that was saved.
+    """
+
+    def __init__(
+        self,
+        cancel_event: Optional[threading.Event] = None,
+        work_saved: Optional[WorkSaved] = None,
+        deadline: Optional[float] = None,
+    ):
+        """
+        Args:
+            cancel_event: Event set when the run is cancelled.
+            work_saved: Optional counters of the work skipped after cancellation.
+            deadline: Optional `time.monotonic()` time by which the run has to finish.
+        """
+        self.cancel_event = cancel_event or threading.Event()
+        self.work_saved = work_saved or WorkSaved()
+        self.deadline = deadline
+        self.stopped = False
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None without a deadline."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def check(self, counter: str) -> None:
+        """
+        Raise `RunCancelled` if the run has been cancelled or its deadline has passed.
+
+        Args:
+            counter: The `WorkSaved` counter of the skipped call, e.g. "skipped_llm_calls".
+        """
+        if self.cancel_event.is_set():
+            self._stop(counter)
+            raise RunCancelled()
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            self._stop(counter)
+            raise RunDeadlineExceeded()
+
+    def _stop(self, counter: str) -> None:
+        if not self.stopped:
+            self.stopped = True
+            self.work_saved.add(counter)
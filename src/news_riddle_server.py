@@ -1,13 +1,101 @@
 from a2a_min.middleware import LoggingMiddleware
-from a2a_min import AgentAdapter, A2aMinServer, AgentInvocationResult
+from a2a_min import AgentAdapter, AgentInvocationResult
 from a2a_min.base.types import (
     AgentCard,
     AgentCapabilities,
     AgentSkill,
+    DataPart,
+    Message,
 )
-from news_riddle_agent import AINewsRiddleAgent
+from a2a_min_subscribe_server import A2AMinSubscribeServer
+from a2a_min_subscribe_task_manager import TaskRun, current_task_run
+from news_riddle_models import (
+    AINewsHeadlines,
+    AINewsRiddle,
+    RunDeadlineExceeded,
+    RunGuard,
+    WorkSaved,
+)
+from tracing import current_span, get_tracer
 
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Optional
+import argparse
 import asyncio
+import logging
+import threading
+import time
+
+# crewai and the agent stack are slow to import, they are loaded when the crew is first built
+if TYPE_CHECKING:
+    from crewai.crews.crew_output import CrewOutput
+    from crewai.tasks.task_output import TaskOutput
+    from news_riddle_agent import AINewsRiddleAgent
+
+logger = logging.getLogger(__name__)
+tracer = get_tracer("riddle_crew")
+
+# The number of riddles created when there is enough time
+FULL_RIDDLE_COUNT = 5
+# Rough time the riddle task needs per riddle, used to shrink the set when the deadline is near
+SECONDS_PER_RIDDLE = 4.0
+
+
+def riddle_result(
+    riddles: AINewsRiddle, degraded: Optional[str] = None
+) -> AgentInvocationResult:
+    """
+    Wrap riddles in an agent result with a single structured data part.
+
+    Args:
+        riddles: The validated riddles.
+        degraded: How the riddles were degraded to meet the deadline, "partial" or "cached".
+    """
+    part = DataPart(data=riddles.model_dump())
+    if degraded is not None:
+        part.metadata = {"degraded": degraded}
+    return AgentInvocationResult(message=Message(role="agent", parts=[part]))
+
+
+class RecentRiddles:
+    """
+    Riddles recently created per topic, served when a task runs out of time.
+    """
+
+    def __init__(self, max_topics: int = 256, max_age_s: float = 6 * 60 * 60):
+        """
+        Args:
+            max_topics: The maximum number of topics to keep riddles for.
+            max_age_s: Riddles older than this are considered stale news and not served.
+        """
+        self.max_topics = max_topics
+        self.max_age_s = max_age_s
+        self._riddles: OrderedDict[str, tuple[float, AINewsRiddle]] = OrderedDict()
+
+    def put(self, topic: str, riddles: AINewsRiddle) -> None:
+        key = topic.strip().lower()
+        self._riddles[key] = (time.monotonic(), riddles)
+        self._riddles.move_to_end(key)
+        if len(self._riddles) > self.max_topics:
+            self._riddles.popitem(last=False)
+
+    def get(self, topic: str) -> Optional[AINewsRiddle]:
+        entry = self._riddles.get(topic.strip().lower())
+        if entry is None or time.monotonic() - entry[0] > self.max_age_s:
+            return None
+        return entry[1]
+
+
+def parse_riddles(response: "CrewOutput") -> AINewsRiddle:
+    """
+    Get the validated riddles from the crew's output.
+
+    Args:
+        response: The output of the riddle crew.
+    """
+    if isinstance(response.pydantic, AINewsRiddle):
+        return response.pydantic
+    return AINewsRiddle.model_validate_json(response.raw)
 
 
 class AINewsRiddleAgentAdapter(AgentAdapter):
@@ -15,9 +103,46 @@ class AINewsRiddleAgentAdapter(AgentAdapter):
     An agent that creates riddles based on the latest AI news.
     """
 
-    def __init__(self):
-        self.agent = AINewsRiddleAgent()
+    def __init__(self, crew_startup: str = "background"):
+        """
+        Args:
+            crew_startup: When to import the agent stack and build the crew. "background" starts right
+                away in a background thread, "lazy" waits for the first task and "eager" builds it
+                before returning, delaying the server start.
+        """
+        self._agent: Optional["AINewsRiddleAgent"] = None
+        self._agent_lock = threading.Lock()
+        self.work_saved = WorkSaved()
+        self.recent_riddles = RecentRiddles()
         super().__init__()
+        if crew_startup == "eager":
+            self._build_agent()
+        elif crew_startup == "background":
+            threading.Thread(
+                target=self._build_agent, name="riddle-crew-startup", daemon=True
+            ).start()
+
+    @property
+    def agent(self) -> "AINewsRiddleAgent":
+        """The riddle agent, blocks until it is built."""
+        return self._build_agent()
+
+    def _build_agent(self) -> "AINewsRiddleAgent":
+        with self._agent_lock:
+            if self._agent is None:
+                started = time.perf_counter()
+                from news_riddle_agent import AINewsRiddleAgent
+
+                self._agent = AINewsRiddleAgent(work_saved=self.work_saved)
+                logger.info(f"Built the riddle crew in {time.perf_counter() - started:.2f}s")
+            return self._agent
+
+    async def _get_agent(self) -> "AINewsRiddleAgent":
+        # Building the agent blocks, wait for it without blocking the event loop
+        if self._agent is not None:
+            return self._agent
+        with tracer.span("crew.build_wait"):
+            return await asyncio.to_thread(self._build_agent)
 
     @property
     def name(self):
@@ -29,12 +154,12 @@ class AINewsRiddleAgentAdapter(AgentAdapter):
 
     @property
     def supported_content_types(self):
-        return ["text"]
+        return ["text", "data"]
 
     @property
     def capabilities(self):
         return AgentCapabilities(
-            streaming=True, pushNotifications=False, stateTransitionHistory=False
+            streaming=True, pushNotifications=True, stateTransitionHistory=False
         )
 
     @property
@@ -78,48 +203,201 @@ class AINewsRiddleAgentAdapter(AgentAdapter):
             session_id: A unique identifier for the session.
         """
         self.agent.llm.stream = False
-        response = self.agent.crew.kickoff({"topic": query})
-        agent_response = AgentInvocationResult.agent_msg(
-            response.raw,
-        )
-        return agent_response
+        response = self.agent.build_crew().kickoff({"topic": query})
+        return riddle_result(parse_riddles(response))
+
+    async def invoke_task(
+        self, query: str, session_id: str, run: TaskRun
+    ) -> AgentInvocationResult:
+        """
+        Run the agent, reporting progress events as the crew works through its tasks.
+        Returns fewer or recent riddles rather than failing when the task's deadline is near.
+
+        Args:
+            query: The user's query.
+            session_id: A unique identifier for the session.
+            run: The task run used to report progress.
+        """
+
+        agent = await self._get_agent()
+        agent.llm.stream = False
+        guard = RunGuard(run.cancel_event, self.work_saved, run.deadline)
+        run.report("search_started", topic=query)
+        try:
+            riddles, degraded = await self._run_crew(query, guard, run.report)
+        except asyncio.CancelledError:
+            self._on_cancelled(run.cancel_event)
+            raise
+        if degraded is not None:
+            run.report("degraded", mode=degraded, riddles=len(riddles.riddles))
+        return riddle_result(riddles, degraded)
+
+    async def _run_crew(
+        self,
+        query: str,
+        guard: RunGuard,
+        report: Callable[..., Any] = lambda event, **data: None,
+    ) -> tuple[AINewsRiddle, Optional[str]]:
+        """
+        Run a riddle crew within the guard's deadline.
+
+        When little time is left once the headlines are ready, fewer riddles are asked for. When the
+        deadline passes, recent riddles for the same topic are served instead, or
+        `RunDeadlineExceeded` is raised if there are none.
+
+        The run is traced in a "crew.kickoff" span with a "crew.news_search" and a "crew.riddles"
+        stage, which are the parents of the stage's LLM and search spans.
+
+        Returns:
+            The riddles and how they were degraded, "partial", "cached" or None.
+        """
+        limited_to = None
+        stage = None
+
+        def on_task_output(output: "TaskOutput"):
+            nonlocal limited_to, stage
+            if isinstance(output.pydantic, AINewsHeadlines):
+                stage.end()
+                # Runs in the crew thread, the riddle task's calls are traced under the next stage
+                stage = tracer.start_span("crew.riddles", kickoff_span)
+                current_span.set(stage)
+                report("headlines_ready", headlines=output.pydantic.headlines)
+                remaining = guard.remaining()
+                if remaining is not None and remaining < FULL_RIDDLE_COUNT * SECONDS_PER_RIDDLE:
+                    limited_to = max(1, int(remaining // SECONDS_PER_RIDDLE))
+                    agent.limit_riddles(crew, limited_to)
+            elif isinstance(output.pydantic, AINewsRiddle):
+                stage.set(riddles=len(output.pydantic.riddles))
+                stage.end()
+                for index, riddle in enumerate(output.pydantic.riddles):
+                    report("riddle_ready", index=index, riddle=riddle)
+
+        def kickoff():
+            # Runs in the crew thread, with a copy of the caller's context
+            nonlocal stage
+            stage = tracer.start_span("crew.news_search", kickoff_span)
+            current_span.set(stage)
+            return crew.kickoff({"topic": query})
 
-    async def async_invoke(self, query: str) -> AgentInvocationResult:
+        agent = await self._get_agent()
+        crew = agent.build_crew(task_callback=on_task_output, guard=guard)
+        with tracer.span("crew.kickoff", topic=query) as kickoff_span:
+            try:
+                # The crew blocks, run it off the event loop so other tasks keep being served
+                response = await asyncio.wait_for(
+                    asyncio.to_thread(kickoff), guard.remaining()
+                )
+                riddles = parse_riddles(response)
+            except (asyncio.TimeoutError, RunDeadlineExceeded) as e:
+                # The guard stops the crew thread at its next LLM or search call
+                if stage is not None:
+                    stage.end(e)
+                cached = self.recent_riddles.get(query)
+                if cached is None:
+                    raise RunDeadlineExceeded(
+                        f"Deadline exceeded before riddles about '{query}' were ready, "
+                        "and there are no recent ones to serve"
+                    ) from e
+                logger.warning(f"Deadline passed for '{query}', serving recent riddles")
+                kickoff_span.set(degraded="cached")
+                return cached, "cached"
+            except BaseException as e:
+                if stage is not None:
+                    stage.end(e)
+                raise
+
+        self.recent_riddles.put(query, riddles)
+        return riddles, None if limited_to is None else "partial"
+
+    def _on_cancelled(self, cancel_event: threading.Event):
+        # The crew thread keeps going until its next LLM or search call, which the guard refuses
+        cancel_event.set()
+        self.work_saved.add("cancelled_runs")
+        logger.info(f"Riddle run cancelled, work saved so far: {self.work_saved}")
+
+    async def async_invoke(self, query: str, guard: RunGuard = None) -> AgentInvocationResult:
         """
         Async execution of the agent
 
         Args:
             query: The user's query.
+            guard: Optional guard used to cancel the run's LLM and search calls.
         """
-        return await self.agent.crew.kickoff_async({"topic": query})
+        agent = await self._get_agent()
+        return await agent.build_crew(guard=guard).kickoff_async({"topic": query})
 
     async def stream(self, query: str, session_id: str):
         """Stream a response to a query.
 
-        Default implementation yields the invoke result.
-
         Args:
             query: The user's query.
             session_id: A unique identifier for the session.
 
         Yields:
-            AgentInvocationResult objects containing parts of the agent's response.
+            One result per riddle, each holding a data part with a single riddle, answer and hint,
+            followed by a complete result holding all riddles.
         """
-        self.agent.llm.stream = True
-        response = await self.async_invoke(query)
-        response = response.raw
-        for word in response.split():
-            result = AgentInvocationResult.agent_msg(f"{word} ")
+        (await self._get_agent()).llm.stream = True
+        run = current_task_run.get()
+        if run is not None:
+            guard = RunGuard(run.cancel_event, self.work_saved, run.deadline)
+        else:
+            guard = RunGuard(work_saved=self.work_saved)
+        try:
+            riddles, degraded = await self._run_crew(query, guard)
+        except asyncio.CancelledError:
+            # The client disconnected while the crew was running
+            self._on_cancelled(guard.cancel_event)
+            raise
+        for riddle, answer, hint in zip(riddles.riddles, riddles.answers, riddles.hints):
+            result = riddle_result(
+                AINewsRiddle(riddles=[riddle], answers=[answer], hints=[hint])
+            )
             result.is_complete = False
             yield result
             await asyncio.sleep(0.05)
-        response = AgentInvocationResult.agent_msg(response)
+        response = riddle_result(riddles, degraded)
         response.is_complete = True
         yield response
 
 
 if __name__ == "__main__":
-    # Start the AINewsRiddleAgent server
-    A2aMinServer.from_agent(
-        AINewsRiddleAgentAdapter(), middlewares=[LoggingMiddleware()]
-    ).start()
+    parser = argparse.ArgumentParser(description="Serve the AINewsRiddleAgent.")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Number of worker processes sharing the port."
+    )
+    parser.add_argument(
+        "--store", default="a2a_tasks.sqlite3", help="Task store shared by the workers."
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=60.0,
+        help="Time budget in seconds for tasks that don't set `deadline_s` in their metadata.",
+    )
+    parser.add_argument(
+        "--crew-startup",
+        choices=["background", "lazy", "eager"],
+        default="background",
+        help="Build the crew in the background, on the first task, or before serving.",
+    )
+    args = parser.parse_args()
+
+    # Start the AINewsRiddleAgent server. Tasks sent with a push notification config run in the
+    # background and post progress events to the callback url, other tasks block until completed.
+    if args.workers > 1:
+        A2AMinSubscribeServer.start_workers(
+            lambda: AINewsRiddleAgentAdapter(crew_startup=args.crew_startup),
+            workers=args.workers,
+            middlewares=[LoggingMiddleware()],
+            block_without_push=True,
+            store_path=args.store,
+            default_deadline_s=args.deadline,
+        )
+    else:
+        A2AMinSubscribeServer.from_agent(
+            AINewsRiddleAgentAdapter(crew_startup=args.crew_startup),
+            middlewares=[LoggingMiddleware()],
+            block_without_push=True,
+            default_deadline_s=args.deadline,
+        ).start()
@@ -0,0 +1,344 @@
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+import asyncio
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitTimeout(TimeoutError):
+    """Raised when a caller couldn't get a permit within its timeout."""
+
+
+class TokenBucket:
+    """
+    A bucket refilled continuously at `per_minute / 60` units per second, holding at most a minute's worth.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until `amount` units are available, 0 if they are already."""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        # Can go below zero when actual usage exceeds the estimate, the debt is paid off by refills
+        self.level -= amount
+
+
+@dataclass
+class _Waiter:
+    tokens: float
+    wake: Callable[[], None]
+    admitted: bool = False
+
+
+class Permit:
+    """
+    Admission to make one outbound call. Report the outcome with `ok` or `failed`, so the limiter
+    can adapt its concurrency, and return it with `AdaptiveRateLimiter.release`.
+    """
+
+    def __init__(self, limiter: "AdaptiveRateLimiter", tokens: float):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.started = time.monotonic()
+        self.latency: Optional[float] = None
+        self.succeeded = False
+        self.throttled = False
+
+    def ok(self, actual_tokens: Optional[float] = None) -> None:
+        """
+        Record a successful call. Can be called at the first streamed chunk to measure time to first token.
+
+        Args:
+            actual_tokens: The tokens actually used, if known, to correct the estimate.
+        """
+        if self.latency is None:
+            self.latency = time.monotonic() - self.started
+        self.succeeded = True
+        if actual_tokens is not None:
+            self.limiter.correct_tokens(actual_tokens - self.tokens)
+            self.tokens = actual_tokens
+
+    def failed(self, throttled: bool) -> None:
+        """
+        Record a failed call.
+
+        Args:
+            throttled: Whether the call was rejected by the provider's rate limit.
+        """
+        self.latency = time.monotonic() - self.started
+        self.throttled = throttled
+
+
+class AdaptiveRateLimiter:
+    """
+    Limits outbound calls to one provider with token buckets for requests and tokens per minute, and an
+    AIMD concurrency limit.
+
+    Callers are admitted strictly in arrival order, whether they wait from a thread or a coroutine, so
+    a large request can't be starved by a stream of small ones. The concurrency limit grows by about
+    one per round of successful calls and is halved on a throttled call or a call slower than
+    `target_latency_s`, at most once per `backoff_interval_s`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: int = 32,
+        min_concurrency: int = 1,
+        target_latency_s: Optional[float] = None,
+        backoff_interval_s: float = 5.0,
+    ):
+        """
+        Args:
+            name: The provider name, used in logs.
+            requests_per_minute: Requests allowed per minute.
+            tokens_per_minute: Optional tokens allowed per minute.
+            max_concurrency: Upper bound of the concurrency limit.
+            min_concurrency: Lower bound of the concurrency limit.
+            target_latency_s: Optional latency above which calls count as an overload signal.
+            backoff_interval_s: Minimum time between two decreases of the concurrency limit.
+        """
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = None if tokens_per_minute is None else TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.target_latency_s = target_latency_s
+        self.backoff_interval_s = backoff_interval_s
+
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self.throttled_calls = 0
+        self._last_backoff = 0.0
+        self._queue: deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def acquire(self, tokens: float = 0, timeout: Optional[float] = None) -> Permit:
+        """
+        Wait for a permit from a thread.
+
+        Args:
+            tokens: Estimated tokens of the call.
+            timeout: Optional number of seconds to wait before raising `RateLimitTimeout`.
+        """
+        event = threading.Event()
+        waiter = self._enqueue(tokens, event.set)
+        if not event.wait(timeout) and not self._abandon(waiter):
+            raise RateLimitTimeout(f"No {self.name} permit within {timeout}s")
+        return Permit(self, tokens)
+
+    async def acquire_async(self, tokens: float = 0, timeout: Optional[float] = None) -> Permit:
+        """
+        Wait for a permit from a coroutine.
+
+        Args:
+            tokens: Estimated tokens of the call.
+            timeout: Optional number of seconds to wait before raising `RateLimitTimeout`.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._enqueue(tokens, wake)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                raise RateLimitTimeout(f"No {self.name} permit within {timeout}s")
+        except asyncio.CancelledError:
+            if self._abandon(waiter):
+                self.release(Permit(self, tokens))
+            raise
+        return Permit(self, tokens)
+
+    def release(self, permit: Permit) -> None:
+        """
+        Return a permit and adapt the concurrency limit to the call's outcome.
+
+        Args:
+            permit: The permit of the finished call.
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if permit.throttled:
+                self.throttled_calls += 1
+                self._backoff()
+            elif (
+                permit.latency is not None
+                and self.target_latency_s is not None
+                and permit.latency > self.target_latency_s
+            ):
+                self._backoff()
+            elif permit.succeeded:
+                self.concurrency_limit = min(
+                    self.max_concurrency,
+                    self.concurrency_limit + 1 / self.concurrency_limit,
+                )
+            self._dispatch()
+
+    def correct_tokens(self, difference: float) -> None:
+        """Charge (or refund) the difference between actual and estimated tokens of a call."""
+        if self.tokens is None:
+            return
+        with self._lock:
+            self.tokens.refill(time.monotonic())
+            self.tokens.take(difference)
+
+    @contextmanager
+    def limit(self, tokens: float = 0, timeout: Optional[float] = None):
+        """Hold a permit for the duration of a blocking call."""
+        permit = self.acquire(tokens, timeout)
+        try:
+            yield permit
+        finally:
+            self.release(permit)
+
+    @asynccontextmanager
+    async def alimit(self, tokens: float = 0, timeout: Optional[float] = None):
+        """Hold a permit for the duration of an async call."""
+        permit = await self.acquire_async(tokens, timeout)
+        try:
+            yield permit
+        finally:
+            self.release(permit)
+
+    def _enqueue(self, tokens: float, wake: Callable[[], None]) -> _Waiter:
+        waiter = _Waiter(tokens, wake)
+        with self._lock:
+            self._queue.append(waiter)
+            self._dispatch()
+        return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Remove a waiter that gave up. Returns True if it was admitted in the meantime."""
+        with self._lock:
+            if waiter.admitted:
+                return True
+            self._queue.remove(waiter)
+            self._dispatch()
+            return False
+
+    def _backoff(self) -> None:
+        now = time.monotonic()
+        if now - self._last_backoff < self.backoff_interval_s:
+            return
+        self._last_backoff = now
+        self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+        logger.warning(
+            f"Backing off {self.name} calls, concurrency limit {self.concurrency_limit:.1f}"
+        )
+
+    def _dispatch(self) -> None:
+        # Called with the lock held, admits waiters from the head of the queue while there is capacity
+        now = time.monotonic()
+        self.requests.refill(now)
+        if self.tokens is not None:
+            self.tokens.refill(now)
+
+        while self._queue and self.in_flight < int(self.concurrency_limit):
+            waiter = self._queue[0]
+            wait = self.requests.time_until(1)
+            if self.tokens is not None:
+                wait = max(wait, self.tokens.time_until(waiter.tokens))
+            if wait > 0:
+                self._schedule_dispatch(wait)
+                return
+            self._queue.popleft()
+            self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(waiter.tokens)
+            self.in_flight += 1
+            waiter.admitted = True
+            waiter.wake()
+
+    def _schedule_dispatch(self, delay: float) -> None:
+        if self._timer is not None and self._timer.is_alive():
+            return
+        self._timer = threading.Timer(delay, self._dispatch_later)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _dispatch_later(self) -> None:
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+# Default limits per provider, overridable with <PROVIDER>_RPM and <PROVIDER>_TPM environment variables
+_DEFAULT_LIMITS = {
+    "openai": {"requests_per_minute": 500, "tokens_per_minute": 30_000, "target_latency_s": 30.0},
+    "serper": {"requests_per_minute": 300, "tokens_per_minute": None, "target_latency_s": 10.0},
+}
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> AdaptiveRateLimiter:
+    """
+    Get the process-wide limiter of a provider, creating it on first use.
+
+    Args:
+        name: The provider name, e.g. "openai" or "serper".
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            defaults = _DEFAULT_LIMITS.get(name, {"requests_per_minute": 60, "tokens_per_minute": None})
+            prefix = name.upper()
+            limiter = _limiters[name] = AdaptiveRateLimiter(
+                name,
+                requests_per_minute=_env_float(f"{prefix}_RPM", defaults["requests_per_minute"]),
+                tokens_per_minute=_env_float(f"{prefix}_TPM", defaults["tokens_per_minute"]),
+                target_latency_s=defaults.get("target_latency_s"),
+            )
+        return limiter
+
+
+def estimate_tokens(messages, completion_tokens: int = 1024) -> int:
+    """
+    Roughly estimate the tokens of a chat call, about four characters per token.
+
+    Args:
+        messages: A prompt string or a list of chat messages.
+        completion_tokens: Tokens to reserve for the completion.
+    """
+    if isinstance(messages, str):
+        characters = len(messages)
+    else:
+        characters = sum(len(str(message.get("content") or "")) for message in messages)
+    return characters // 4 + completion_tokens
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether an error is a provider's rate limit rejection (HTTP 429)."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ == "RateLimitError"
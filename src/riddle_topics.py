@@ -0,0 +1,67 @@
+import re
+
+RIDDLE_TRIGGERS = ["riddle", "puzzle", "give me a riddle", "ai riddle"]
+# Words dropped from a message to guess its topic, and from topics to compare them
+TOPIC_STOPWORDS = {
+    "a", "about", "an", "and", "any", "can", "could", "create", "for", "generate", "give", "i", "in",
+    "is", "like", "make", "me", "more", "new", "of", "on", "please", "puzzle", "puzzles", "regarding",
+    "related", "riddle", "riddles", "some", "tell", "the", "to", "topic", "us", "want", "with",
+    "would", "you",
+}
+
+
+def asks_for_riddle(message: str) -> bool:
+    """
+    Whether a message asks for a riddle, by its trigger words.
+
+    Args:
+        message (str): The user's input message.
+    """
+    return any(trigger in message.lower() for trigger in RIDDLE_TRIGGERS)
+
+
+def topic_words(text: str) -> list[str]:
+    """
+    Split a text into the lowercase words that make up a topic.
+
+    Args:
+        text (str): A message or an extracted topic.
+
+    Returns:
+        list: The words, without stopwords and punctuation.
+    """
+    words = re.findall(r"[a-z0-9]+(?:[.+#-][a-z0-9]+)*", text.lower())
+    return [word for word in words if word not in TOPIC_STOPWORDS]
+
+
+def same_topic(topic: str, guess: str) -> bool:
+    """
+    Whether a guessed topic matches the extracted one, when the words of one contain the other's.
+    E.g. the guess "latest news arsenal" matches the topic "Arsenal".
+
+    Args:
+        topic (str): The extracted topic.
+        guess (str): The guessed topic.
+
+    Returns:
+        bool: True if riddles on the guess can be served for the topic.
+    """
+    topic_set, guess_set = set(topic_words(topic)), set(topic_words(guess))
+    if not topic_set or not guess_set:
+        return False
+    return topic_set <= guess_set or guess_set <= topic_set
+
+
+def guess_topic(message: str) -> str:
+    """
+    Cheaply guess the topic of a riddle request without calling OpenAI.
+
+    Args:
+        message (str): The user's input message.
+
+    Returns:
+        str: The guessed topic, or an empty string if the message isn't a riddle request.
+    """
+    if not asks_for_riddle(message):
+        return ""
+    return " ".join(topic_words(message))
@@ -1,4 +1,9 @@
 from a2a_min import AgentAdapter, A2aMinServer, AgentInvocationResult
+from a2a_min.base.server.server import A2AServer
+from a2a_min_task_store import A2aMinSharedTaskManager, SqliteTaskStore
+from a2a_min_workers import serve_workers
+
+import argparse
 
 
 class EchoAgent(AgentAdapter):
@@ -9,6 +14,32 @@ class EchoAgent(AgentAdapter):
         return AgentInvocationResult.agent_msg(f"Echo: {query}")
 
 
+def build_shared_server(
+    store: SqliteTaskStore, host: str = "localhost", port: int = 8000
+) -> A2AServer:
+    """Build an echo server whose tasks are shared with other workers through the store."""
+    agent = EchoAgent()
+    return A2AServer(
+        agent_card=agent.get_agent_card(f"http://{host}:{port}/"),
+        task_manager=A2aMinSharedTaskManager(agent, store),
+        host=host,
+        port=port,
+    )
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the echo agent.")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Number of worker processes sharing the port."
+    )
+    parser.add_argument(
+        "--store", default="a2a_tasks.sqlite3", help="Task store shared by the workers."
+    )
+    args = parser.parse_args()
+
     # Start the echo agent server
-    A2aMinServer.from_agent(EchoAgent()).start()
+    if args.workers > 1:
+        store = SqliteTaskStore(args.store)
+        serve_workers(lambda: build_shared_server(store), workers=args.workers)
+    else:
+        A2aMinServer.from_agent(EchoAgent()).start()
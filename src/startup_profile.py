@@ -0,0 +1,100 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import json
+import subprocess
+import sys
+import tomllib
+
+SRC_DIR = Path(__file__).resolve().parent
+
+
+def profile_imports(module: str) -> Dict:
+    """
+    Import a module in a fresh interpreter with `-X importtime` and summarize the cost.
+
+    Args:
+        module: The module to import, e.g. "news_riddle_server".
+
+    Returns:
+        A report with the total import time and the cumulative time per top-level package, in ms.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    packages: Dict[str, float] = defaultdict(float)
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nesting is shown by two spaces per level after the separator's own space. Modules imported
+        # directly by the profiled module are one level deep and their cumulative time includes
+        # everything they import in turn.
+        # Children are listed before their parent, so the modules seen since the previous top-level
+        # import belong to the next one, interpreter startup imports are discarded.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == module:
+                total_us = int(cumulative)
+                break
+            packages.clear()
+        elif depth == 1:
+            packages[name.strip().split(".")[0]] += int(cumulative) / 1000
+
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "packages_ms": {
+            package: round(ms, 1)
+            for package, ms in sorted(packages.items(), key=lambda item: -item[1])
+        },
+    }
+
+
+def project_version() -> str:
+    pyproject = SRC_DIR.parent / "pyproject.toml"
+    with pyproject.open("rb") as f:
+        return tomllib.load(f)["project"]["version"]
+
+
+def print_report(report: Dict, top: int) -> None:
+    print(f"{report['module']}: {report['total_ms']:.1f} ms")
+    for package, ms in list(report["packages_ms"].items())[:top]:
+        print(f"  {package:<30} {ms:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the import time of the server modules.")
+    parser.add_argument(
+        "modules", nargs="*", default=["news_riddle_server", "news_riddle_agent"]
+    )
+    parser.add_argument("--top", type=int, default=15, help="Number of packages to show.")
+    parser.add_argument(
+        "--output", help="Append the reports to this JSONL file, to track startup cost per release."
+    )
+    args = parser.parse_args()
+
+    reports: List[Dict] = []
+    for module in args.modules:
+        report = profile_imports(module)
+        print_report(report, args.top)
+        reports.append(report)
+
+    if args.output:
+        record = {
+            "version": project_version(),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "reports": reports,
+        }
+        with open(args.output, "a") as f:
+            f.write(json.dumps(record) + "\n")
@@ -0,0 +1,174 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+import argparse
+import json
+import re
+import time
+
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+_UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def load_spans(path: str, since: float, until: float) -> Dict[str, List[Dict]]:
+    """
+    Read the spans of the traces that started within a time window.
+
+    Args:
+        path: The JSONL file written by the tracing exporter.
+        since: Start of the window, in seconds since the epoch.
+        until: End of the window, in seconds since the epoch.
+
+    Returns:
+        The spans grouped by trace ID.
+    """
+    traces: Dict[str, List[Dict]] = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                span = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a process that was killed while writing
+                continue
+            traces[span["trace_id"]].append(span)
+    return {
+        trace_id: spans
+        for trace_id, spans in traces.items()
+        if since <= min(span["start"] for span in spans) <= until
+    }
+
+
+def _end(span: Dict) -> float:
+    return span["start"] + span["duration"]
+
+
+def root_span(spans: List[Dict]) -> Dict:
+    """The outermost span of a trace, the earliest of the spans without a recorded parent."""
+    span_ids = {span["span_id"] for span in spans}
+    roots = [span for span in spans if span["parent_id"] not in span_ids]
+    return min(roots, key=lambda span: (span["start"], -span["duration"]))
+
+
+def critical_path(spans: List[Dict]) -> List[Tuple[Dict, float]]:
+    """
+    Find the critical path of a trace, the chain of work that determined its end to end latency.
+
+    Starting from the end of the root span, the path steps into the child that finished last, then
+    into the child that finished last before that one started, and so on. Time not covered by a child
+    is attributed to the span itself.
+
+    Returns:
+        The spans on the path with the seconds attributed to each, in time order.
+    """
+    children: Dict[str, List[Dict]] = defaultdict(list)
+    for span in spans:
+        if span["parent_id"] is not None:
+            children[span["parent_id"]].append(span)
+
+    segments: List[Tuple[Dict, float]] = []
+
+    def walk(span: Dict, cursor: float) -> None:
+        # Appends segments latest first, clipped to end at `cursor`
+        cursor = min(_end(span), cursor)
+        for child in sorted(children[span["span_id"]], key=_end, reverse=True):
+            if child["start"] >= cursor:
+                continue
+            child_end = min(_end(child), cursor)
+            segments.append((span, cursor - child_end))
+            walk(child, child_end)
+            cursor = max(child["start"], span["start"])
+        segments.append((span, cursor - span["start"]))
+
+    root = root_span(spans)
+    walk(root, _end(root))
+    return [(span, seconds) for span, seconds in reversed(segments) if seconds > 0]
+
+
+def breakdown(traces: Iterable[List[Dict]]) -> Dict[str, float]:
+    """
+    Seconds spent on the critical path per span name, summed over traces.
+
+    Args:
+        traces: The spans of each trace.
+    """
+    totals: Dict[str, float] = defaultdict(float)
+    for spans in traces:
+        for span, seconds in critical_path(spans):
+            totals[span["name"]] += seconds
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def _label(span: Dict) -> str:
+    return f"{span['service']}:{span['name']}"
+
+
+def print_report(traces: Dict[str, List[Dict]], top: int) -> None:
+    spans = [span for trace in traces.values() for span in trace]
+    print(f"{len(traces)} traces, {len(spans)} spans")
+    if not traces:
+        return
+
+    durations = sorted(root_span(trace)["duration"] for trace in traces.values())
+    p50 = durations[len(durations) // 2]
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    print(f"End to end: p50 {p50:.2f}s, p95 {p95:.2f}s, max {durations[-1]:.2f}s")
+
+    totals = breakdown(traces.values())
+    total = sum(totals.values()) or 1.0
+    print("\nCritical path breakdown:")
+    for name, seconds in list(totals.items())[:top]:
+        print(
+            f"  {name:<32} {seconds / len(traces):>8.2f}s per trace {100 * seconds / total:>6.1f}%"
+        )
+
+    slowest_trace = max(traces.values(), key=lambda trace: root_span(trace)["duration"])
+    root = root_span(slowest_trace)
+    print(f"\nSlowest trace {root['trace_id']} ({root['duration']:.2f}s):")
+    for span, seconds in critical_path(slowest_trace):
+        if seconds < 0.001:
+            # Gaps between a span and its children
+            continue
+        print(f"  +{span['start'] - root['start']:>7.2f}s  {_label(span):<44} {seconds:>7.2f}s")
+
+    print("\nSlowest spans:")
+    for span in sorted(spans, key=lambda span: -span["duration"])[:top]:
+        started = datetime.fromtimestamp(span["start"]).strftime("%H:%M:%S")
+        status = "" if span["status"] == "ok" else f" [{span['status']}]"
+        print(
+            f"  {span['duration']:>8.2f}s  {_label(span):<44} {started}  {span['trace_id'][:8]}{status}"
+        )
+
+
+def parse_time(value: str) -> float:
+    """A time given as an ISO timestamp, in seconds since the epoch."""
+    return datetime.fromisoformat(value).timestamp()
+
+
+def parse_duration(value: str) -> float:
+    """A duration such as "90s", "15m", "2h" or "1d", in seconds."""
+    match = _DURATION.match(value)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"Invalid duration: {value}")
+    return float(match.group(1)) * _UNITS[match.group(2)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Print critical path breakdowns and the slowest spans of recorded traces."
+    )
+    parser.add_argument("path", nargs="?", default="traces.jsonl", help="The span file.")
+    parser.add_argument(
+        "--last", type=parse_duration, default=parse_duration("1h"),
+        help="Analyze the traces started within this long, e.g. 15m. Defaults to 1h.",
+    )
+    parser.add_argument("--since", type=parse_time, help="Start of the window, an ISO timestamp.")
+    parser.add_argument("--until", type=parse_time, help="End of the window, an ISO timestamp.")
+    parser.add_argument("--top", type=int, default=10, help="Number of entries per section.")
+    args = parser.parse_args()
+
+    until = args.until if args.until is not None else time.time()
+    since = args.since if args.since is not None else until - args.last
+    print_report(load_spans(args.path, since, until), args.top)
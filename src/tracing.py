@@ -0,0 +1,288 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import asyncio
+import atexit
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# W3C trace context header, carried as the "traceparent" field of the A2A request metadata
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+@dataclass
+class SpanContext:
+    """
+    The identity of a span, enough to continue its trace in another process.
+    """
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+@dataclass
+class Span(SpanContext):
+    """
+    A timed operation of a trace. Spans of unsampled traces carry the trace context but are never
+    exported, so they cost next to nothing.
+    """
+    name: str = ""
+    service: str = ""
+    parent_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start: float = field(default_factory=time.time)
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+    _exporter: Optional["JsonlSpanExporter"] = field(default=None, repr=False)
+    _ended: bool = field(default=False, repr=False)
+
+    def set(self, **attributes: Any) -> None:
+        """Add small JSON serializable attributes to the span."""
+        if self.sampled:
+            self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """
+        End the span and export it. Only the first call has an effect.
+
+        Args:
+            error: The exception the operation ended with, if any.
+        """
+        if self._ended or not self.sampled:
+            return
+        self._ended = True
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": self.service,
+            "start": self.start,
+            "duration": time.perf_counter() - self._started,
+            "status": "ok",
+            "pid": os.getpid(),
+            "attributes": self.attributes,
+        }
+        if isinstance(error, asyncio.CancelledError):
+            record["status"] = "cancelled"
+        elif error is not None and not isinstance(error, GeneratorExit):
+            # GeneratorExit only means the consumer of a stream stopped early
+            record["status"] = "error"
+            record["error"] = f"{type(error).__name__}: {error}"
+        if self._exporter is not None:
+            self._exporter.export(record)
+
+
+current_span: ContextVar[Optional[SpanContext]] = ContextVar("current_span", default=None)
+
+
+class JsonlSpanExporter:
+    """
+    Appends finished spans to a JSONL file, one span per line.
+
+    Spans are buffered and written in batches, when `batch_size` spans are buffered, by a background
+    thread every `flush_interval_s`, and when the process exits. Each batch is a single append, so
+    processes sharing the file don't interleave lines.
+    """
+
+    def __init__(self, path: str, batch_size: int = 64, flush_interval_s: float = 2.0):
+        """
+        Args:
+            path: The JSONL file to append spans to.
+            batch_size: Number of buffered spans that triggers a write.
+            flush_interval_s: Maximum time spans stay buffered, also bounds what a killed process loses.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self._buffer: List[bytes] = []
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        atexit.register(self.flush)
+        # Forked workers inherit the parent's buffered spans and maybe a held lock, but no flusher
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def export(self, record: Dict[str, Any]) -> None:
+        line = orjson.dumps(record, default=str) + b"\n"
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+            elif self._flusher is None:
+                # Started on first use, so that it runs in the process exporting the spans
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically, name="span-exporter", daemon=True
+                )
+                self._flusher.start()
+
+    def flush(self) -> None:
+        """Write the buffered spans."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_periodically(self) -> None:
+        while True:
+            time.sleep(self.flush_interval_s)
+            self.flush()
+
+    def _reset_after_fork(self) -> None:
+        # The parent writes its own buffered spans
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        lines, self._buffer = b"".join(self._buffer), []
+        try:
+            with open(self.path, "ab") as f:
+                f.write(lines)
+        except OSError as e:
+            logger.warning(f"Could not write spans to {self.path}: {e}")
+
+
+class Tracer:
+    """
+    Starts the spans of one service, e.g. "gradio_app" or "a2a_server".
+
+    A trace is sampled once, when its root span starts, with probability `sample_rate`. Child spans,
+    also those started in other processes from a propagated trace context, follow that decision.
+    """
+
+    def __init__(self, service: str, exporter: JsonlSpanExporter, sample_rate: float):
+        """
+        Args:
+            service: The name of the service, recorded on every span.
+            exporter: Where finished spans are written.
+            sample_rate: Fraction of new traces that are recorded.
+        """
+        self.service = service
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start_span(
+        self, name: str, parent: Optional[SpanContext] = None, **attributes: Any
+    ) -> Span:
+        """
+        Start a span. It has to be ended with `Span.end`.
+
+        Args:
+            name: The name of the operation, e.g. "crew.kickoff".
+            parent: The parent span or a propagated span context, defaults to the current span.
+            **attributes: Small JSON serializable attributes of the span.
+        """
+        if parent is None:
+            parent = current_span.get()
+        if parent is None:
+            trace_id = f"{random.getrandbits(128):032x}"
+            sampled = random.random() < self.sample_rate
+        else:
+            trace_id, sampled = parent.trace_id, parent.sampled
+        if not sampled:
+            # Keep the parent's identity, nothing of an unsampled span is recorded
+            return Span(
+                trace_id=trace_id,
+                span_id=parent.span_id if parent else f"{random.getrandbits(64):016x}",
+                sampled=False,
+            )
+        return Span(
+            trace_id=trace_id,
+            span_id=f"{random.getrandbits(64):016x}",
+            sampled=True,
+            name=name,
+            service=self.service,
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+            _exporter=self.exporter,
+        )
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[SpanContext] = None, **attributes: Any):
+        """
+        Run a block in a span, which is the current span inside the block.
+
+        Don't yield from an async generator inside the block, the current span can't be restored
+        when the generator is resumed in another context. Use `start_span` there instead.
+        """
+        span = self.start_span(name, parent, **attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(e)
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+
+
+def inject(metadata: Dict[str, Any], span: Optional[SpanContext] = None) -> Dict[str, Any]:
+    """
+    Add the trace context of a span to A2A request metadata.
+
+    Args:
+        metadata: The request metadata, updated in place.
+        span: The span to continue on the server, defaults to the current span.
+
+    Returns:
+        The metadata.
+    """
+    span = span or current_span.get()
+    if span is not None:
+        metadata["traceparent"] = span.traceparent()
+    return metadata
+
+
+def extract(metadata: Optional[Dict[str, Any]]) -> Optional[SpanContext]:
+    """
+    Get the trace context propagated in A2A request metadata.
+
+    Args:
+        metadata: The request metadata.
+
+    Returns:
+        The remote parent span context, or None if there is none or it is malformed.
+    """
+    match = _TRACEPARENT.match(str((metadata or {}).get("traceparent", "")))
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    return SpanContext(trace_id, span_id, sampled=bool(int(flags, 16) & 1))
+
+
+_exporter: Optional[JsonlSpanExporter] = None
+_tracers: Dict[str, Tracer] = {}
+_tracers_lock = threading.Lock()
+
+
+def get_tracer(service: str) -> Tracer:
+    """
+    Get the process-wide tracer of a service, creating it on first use.
+
+    Spans are written to `TRACE_FILE` (default "traces.jsonl") and new traces are sampled with
+    probability `TRACE_SAMPLE_RATE` (default 0.1), both read from the environment.
+
+    Args:
+        service: The service name, e.g. "gradio_app".
+    """
+    global _exporter
+    with _tracers_lock:
+        tracer = _tracers.get(service)
+        if tracer is None:
+            if _exporter is None:
+                _exporter = JsonlSpanExporter(os.getenv("TRACE_FILE") or "traces.jsonl")
+            sample_rate = float(os.getenv("TRACE_SAMPLE_RATE") or 0.1)
+            tracer = _tracers[service] = Tracer(service, _exporter, sample_rate)
+        return tracer
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Read when the src modules create their tracers, keeps the spans of test runs out of the repo
+os.environ["TRACE_FILE"] = os.path.join(tempfile.mkdtemp(prefix="traces-"), "traces.jsonl")
@@ -0,0 +1,102 @@
+from a2a_min import AgentAdapter, AgentInvocationResult
+from a2a_min.base.types import (
+    CancelTaskRequest,
+    Message,
+    SendTaskStreamingRequest,
+    TaskSendParams,
+    TaskState,
+    TextPart,
+)
+from a2a_min_subscribe_task_manager import A2aMinSubscribeTaskManager
+from news_riddle_models import RunCancelled, RunGuard, WorkSaved
+
+import asyncio
+import threading
+
+import pytest
+
+
+class BlockingStreamAgent(AgentAdapter):
+    """Streams one update, then waits for a second one that never comes."""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def invoke(self, query: str, session_id: str) -> AgentInvocationResult:
+        return AgentInvocationResult.agent_msg(query)
+
+    async def stream(self, query: str, session_id: str):
+        started = AgentInvocationResult.agent_msg("started")
+        started.is_complete = False
+        yield started
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        yield AgentInvocationResult.agent_msg(query)
+
+
+def _stream_request(task_id: str) -> SendTaskStreamingRequest:
+    return SendTaskStreamingRequest(
+        params=TaskSendParams(
+            id=task_id,
+            sessionId="session",
+            message=Message(role="user", parts=[TextPart(text="hello")]),
+        )
+    )
+
+
+def test_stream_disconnect_cancels_the_agent():
+    agent = BlockingStreamAgent()
+
+    async def scenario():
+        manager = A2aMinSubscribeTaskManager(agent)
+        events = await manager.on_send_task_subscribe(_stream_request("task-1"))
+        await events.__anext__()
+        # The client goes away before the final event
+        await events.aclose()
+        await asyncio.sleep(0.1)
+        # Read before asyncio.run cancels whatever is still running
+        return manager, agent.cancelled
+
+    manager, cancelled = asyncio.run(scenario())
+    assert cancelled
+    assert manager.tasks["task-1"].status.state == TaskState.CANCELED
+    assert manager.cancelled_runs == {"disconnect": 1}
+    assert "task-1" not in manager.runs
+
+
+def test_cancel_task_ends_the_stream_with_canceled():
+    agent = BlockingStreamAgent()
+
+    async def scenario():
+        manager = A2aMinSubscribeTaskManager(agent)
+        events = await manager.on_send_task_subscribe(_stream_request("task-1"))
+        await events.__anext__()
+        response = await manager.on_cancel_task(CancelTaskRequest(params={"id": "task-1"}))
+        remaining = [event async for event in events]
+        await asyncio.sleep(0.1)
+        return manager, response, remaining, agent.cancelled
+
+    manager, response, remaining, cancelled = asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert cancelled
+    assert response.error is None
+    assert response.result.status.state == TaskState.CANCELED
+    assert remaining[-1].result.final
+    assert remaining[-1].result.status.state == TaskState.CANCELED
+    assert manager.cancelled_runs == {"tasks/cancel": 1}
+
+
+def test_guard_counts_a_refused_call_once():
+    work_saved = WorkSaved()
+    cancel_event = threading.Event()
+    guard = RunGuard(cancel_event, work_saved)
+    guard.check("skipped_llm_calls")
+
+    cancel_event.set()
+    # crewai retries the task, which hits the guard again
+    for _ in range(3):
+        with pytest.raises(RunCancelled):
+            guard.check("skipped_llm_calls")
+    assert work_saved.skipped_llm_calls == 1
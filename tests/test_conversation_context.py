@@ -0,0 +1,99 @@
+from conversation_context import ConversationContext, Conversations, count_tokens
+
+import asyncio
+
+import pytest
+
+
+def _text(tokens: int) -> str:
+    # count_tokens adds one for any text
+    return "x" * 4 * (tokens - 1)
+
+
+class Completions:
+    """Answers summary requests, failing while `failing` is set."""
+
+    def __init__(self, context: ConversationContext):
+        self.context = context
+        self.failing = False
+        self.prompts_during_call = []
+
+    async def __call__(self, messages):
+        # Another message is sent while the summary is being written
+        self.prompts_during_call.append(self.context.build_messages("meanwhile")[0])
+        if self.failing:
+            raise RuntimeError("rate limited")
+        return "summary"
+
+
+def test_oldest_turns_are_evicted_beyond_the_budget():
+    context = ConversationContext(token_budget=100, summary_batch_tokens=1000)
+    for _ in range(3):
+        context.add_turn(_text(20), _text(20))
+
+    assert len(context.turns) == 4
+    assert context.turn_tokens == 80
+    assert context.evicted_tokens == 40
+    # Evicted turns are still sent until they are summarized
+    messages, tokens = context.build_messages(_text(5))
+    assert len(messages) == 7
+    assert tokens == 125
+
+
+def test_latest_exchange_is_kept_over_budget():
+    context = ConversationContext(token_budget=10)
+    context.add_turn(_text(50), _text(50))
+    assert len(context.turns) == 2
+    assert context.evicted == []
+
+
+def test_summary_waits_for_a_batch_and_keeps_turns_until_it_is_in_place():
+    context = ConversationContext(token_budget=100, summary_batch_tokens=60)
+    complete = Completions(context)
+    context.add_turn(_text(20), _text(20))
+    context.add_turn(_text(20), _text(20))
+    context.add_turn(_text(20), _text(20))
+    asyncio.run(context.update_summary(complete))
+    # 40 evicted tokens aren't a batch yet
+    assert complete.prompts_during_call == []
+
+    context.add_turn(_text(20), _text(20))
+    asyncio.run(context.update_summary(complete))
+    # The evicted turns were still in the prompt while the summary was written
+    assert len(complete.prompts_during_call[0]) == 9
+    assert context.summary == "summary"
+    assert context.evicted == []
+    assert context.build_messages("next")[0][0]["content"].endswith("summary")
+
+
+def test_failed_summaries_keep_a_bounded_number_of_turns():
+    context = ConversationContext(token_budget=100, summary_batch_tokens=40, max_pending_tokens=100)
+    complete = Completions(context)
+    complete.failing = True
+    for _ in range(10):
+        context.add_turn(_text(20), _text(20))
+        asyncio.run(context.update_summary(complete))
+
+    assert context.summary == ""
+    assert context.evicted_tokens == 100
+    assert sum(tokens for _, tokens in context.evicted) == 100
+    # The newest evicted turns are the ones kept
+    assert context.evicted[-1][0] == {"role": "assistant", "content": _text(20)}
+
+
+def test_least_recently_active_sessions_are_dropped():
+    conversations = Conversations(max_sessions=2)
+    first = conversations.get("a")
+    conversations.get("b")
+    assert conversations.get("a") is first
+    conversations.get("c")
+    assert conversations.get("a") is first
+    # "b" was dropped, it comes back empty
+    assert conversations.get("b").turns == type(first.turns)()
+    conversations.drop("a")
+    assert conversations.get("a") is not first
+
+
+@pytest.mark.parametrize("text, tokens", [("", 1), ("abcd", 2), ("x" * 400, 101)])
+def test_count_tokens(text, tokens):
+    assert count_tokens(text) == tokens
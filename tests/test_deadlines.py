@@ -0,0 +1,111 @@
+from a2a_min import AgentAdapter, AgentInvocationResult
+from a2a_min.base.types import (
+    GetTaskRequest,
+    Message,
+    SendTaskRequest,
+    SendTaskStreamingRequest,
+    TaskSendParams,
+    TaskState,
+    TextPart,
+)
+from a2a_min_subscribe_task_manager import A2aMinSubscribeTaskManager
+from news_riddle_models import RunDeadlineExceeded, RunGuard
+from news_riddle_server import AINewsRiddleAgentAdapter
+
+import asyncio
+import time
+
+import pytest
+
+
+class EchoAgent(AgentAdapter):
+    def invoke(self, query: str, session_id: str) -> AgentInvocationResult:
+        return AgentInvocationResult.agent_msg(query)
+
+
+class DeadlineStreamAgent(AgentAdapter):
+    """Streams one update, then runs out of time with nothing to fall back on."""
+
+    def invoke(self, query: str, session_id: str) -> AgentInvocationResult:
+        return AgentInvocationResult.agent_msg(query)
+
+    async def stream(self, query: str, session_id: str):
+        started = AgentInvocationResult.agent_msg("started")
+        started.is_complete = False
+        yield started
+        raise RunDeadlineExceeded("Deadline exceeded")
+
+
+class SlowCrew:
+    def kickoff(self, inputs):
+        time.sleep(0.5)
+
+
+class SlowRiddleAgent:
+    """Builds crews that take longer than any deadline in these tests."""
+
+    def build_crew(self, task_callback=None, guard=None):
+        return SlowCrew()
+
+
+def _params(task_id: str, deadline_s) -> TaskSendParams:
+    return TaskSendParams(
+        id=task_id,
+        sessionId="session",
+        message=Message(role="user", parts=[TextPart(text="hello")]),
+        metadata={"deadline_s": deadline_s},
+    )
+
+
+@pytest.mark.parametrize("deadline_s", ["soon", -1, 0, float("nan"), True, [5]])
+def test_invalid_deadline_is_an_invalid_params_error(deadline_s):
+    manager = A2aMinSubscribeTaskManager(EchoAgent(), block_without_push=True)
+
+    async def scenario():
+        sent = await manager.on_send_task(SendTaskRequest(params=_params("task-1", deadline_s)))
+        streamed = await manager.on_send_task_subscribe(
+            SendTaskStreamingRequest(params=_params("task-2", deadline_s))
+        )
+        return sent, streamed
+
+    sent, streamed = asyncio.run(scenario())
+    for response in (sent, streamed):
+        assert response.result is None
+        assert response.error.code == -32602
+    assert manager.tasks == {}
+    assert manager.runs == {}
+
+
+def test_valid_deadline_is_accepted():
+    manager = A2aMinSubscribeTaskManager(EchoAgent(), block_without_push=True)
+    response = asyncio.run(manager.on_send_task(SendTaskRequest(params=_params("task-1", "2.5"))))
+    assert response.error is None
+    assert response.result.artifacts[-1].parts[0].text == "hello"
+
+
+def test_missed_deadline_without_recent_riddles_says_so():
+    adapter = AINewsRiddleAgentAdapter(crew_startup="lazy")
+    adapter._agent = SlowRiddleAgent()
+    guard = RunGuard(deadline=time.monotonic() + 0.1)
+
+    with pytest.raises(RunDeadlineExceeded, match="Deadline exceeded .* 'robots'"):
+        asyncio.run(adapter._run_crew("robots", guard))
+
+
+def test_failed_stream_fails_the_stored_task():
+    manager = A2aMinSubscribeTaskManager(DeadlineStreamAgent())
+
+    async def scenario():
+        request = SendTaskStreamingRequest(params=_params("task-1", 5))
+        events = [event async for event in await manager.on_send_task_subscribe(request)]
+        fetched = await manager.on_get_task(GetTaskRequest(params={"id": "task-1"}))
+        return events, fetched
+
+    events, fetched = asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert events[-1].result.final
+    assert events[-1].result.status.state == TaskState.FAILED
+    assert fetched.result.status.state == TaskState.FAILED
+    assert fetched.result.status.message.parts[0].text == "Error: Deadline exceeded"
+    assert manager.runs == {}
+    # The "failed" notification was the task's final one
+    assert manager.notification_seqs == {}
@@ -0,0 +1,92 @@
+from a2a_min_notification_receiver import NotificationReceiver
+
+import asyncio
+
+
+def _notification(task_id: str, seq: int, event: str) -> dict:
+    return {"id": task_id, "seq": seq, "event": event, "data": {}}
+
+
+def test_redelivered_events_are_dropped():
+    receiver = NotificationReceiver()
+
+    async def scenario():
+        waiter = asyncio.create_task(receiver.wait_for_result("task-1"))
+        for notification in (
+            _notification("task-1", 0, "search_started"),
+            _notification("task-1", 0, "search_started"),
+            _notification("task-1", 1, "completed"),
+            _notification("task-1", 1, "completed"),
+        ):
+            receiver._handle(notification)
+        return await asyncio.wait_for(waiter, 1)
+
+    result = asyncio.run(scenario())
+    assert result["seq"] == 1
+    assert receiver.duplicates == 2
+    assert receiver._completed.qsize() == 1
+
+
+def test_completions_arrive_in_order_including_earlier_ones():
+    receiver = NotificationReceiver()
+
+    async def scenario():
+        # Arrived before anyone iterated
+        receiver._handle(_notification("task-2", 0, "completed"))
+        receiver._handle(_notification("task-1", 0, "headlines_ready"))
+        received = []
+        async for result in receiver.completions():
+            received.append(result["id"])
+            if len(received) == 1:
+                receiver._handle(_notification("task-1", 1, "failed"))
+                receiver._handle(_notification("task-3", 0, "canceled"))
+            if len(received) == 3:
+                return received
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 1)) == ["task-2", "task-1", "task-3"]
+
+
+def test_unconsumed_completions_are_bounded():
+    receiver = NotificationReceiver(max_completions=2)
+
+    async def scenario():
+        for i in range(5):
+            receiver._handle(_notification(f"task-{i}", 0, "completed"))
+        completions = receiver.completions()
+        return [(await completions.__anext__())["id"] for _ in range(2)]
+
+    assert asyncio.run(scenario()) == ["task-3", "task-4"]
+    assert receiver.dropped_completions == 3
+
+
+def test_least_recently_notified_tasks_are_forgotten():
+    receiver = NotificationReceiver(max_tasks=2)
+
+    async def scenario():
+        receiver._handle(_notification("task-1", 0, "completed"))
+        receiver._handle(_notification("task-2", 0, "headlines_ready"))
+        receiver._handle(_notification("task-1", 1, "late_event"))
+        receiver._handle(_notification("task-3", 0, "completed"))
+
+    asyncio.run(scenario())
+    # task-2 was notified least recently
+    assert list(receiver._seen) == ["task-1", "task-3"]
+    assert set(receiver.results) == {"task-1", "task-3"}
+    assert set(receiver._futures) == {"task-1", "task-3"}
+
+
+def test_final_event_replaces_an_input_required_result():
+    receiver = NotificationReceiver()
+
+    async def scenario():
+        receiver._handle(_notification("task-1", 0, "input_required"))
+        paused = await receiver.wait_for_result("task-1", timeout=1)
+        # The task is resumed with the client's answer and its sequence continues
+        receiver._handle(_notification("task-1", 1, "completed"))
+        return paused, await receiver.wait_for_result("task-1", timeout=1)
+
+    paused, result = asyncio.run(scenario())
+    assert paused["event"] == "input_required"
+    assert result["event"] == "completed"
+    assert receiver.duplicates == 0
+    assert receiver._completed.qsize() == 2
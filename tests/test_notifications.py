@@ -0,0 +1,113 @@
+from a2a_min import AgentAdapter, AgentInvocationResult
+from a2a_min.base.types import (
+    Message,
+    PushNotificationConfig,
+    SendTaskRequest,
+    TaskSendParams,
+    TextPart,
+)
+from a2a_min_subscribe_task_manager import A2aMinSubscribeTaskManager, TaskRun
+
+import asyncio
+import json
+import threading
+import time
+
+
+class ReportingAgent(AgentAdapter):
+    def invoke(self, query: str, session_id: str) -> AgentInvocationResult:
+        return AgentInvocationResult.agent_msg(query)
+
+    async def invoke_task(self, query: str, session_id: str, run: TaskRun) -> AgentInvocationResult:
+        for step in range(3):
+            run.report("step", step=step)
+            await asyncio.sleep(0)
+        return AgentInvocationResult.agent_msg(query)
+
+
+class LateReportingAgent(AgentAdapter):
+    """Returns while its worker thread is still going, like a crew after a deadline fallback."""
+
+    def invoke(self, query: str, session_id: str) -> AgentInvocationResult:
+        return AgentInvocationResult.agent_msg(query)
+
+    async def invoke_task(self, query: str, session_id: str, run: TaskRun) -> AgentInvocationResult:
+        run.report("search_started")
+
+        def finish_call():
+            time.sleep(0.05)
+            run.report("riddle_ready", index=0)
+
+        threading.Thread(target=finish_call).start()
+        return AgentInvocationResult.agent_msg(query)
+
+
+class RecordingTaskManager(A2aMinSubscribeTaskManager):
+    """Records the notifications it would post."""
+
+    def __init__(self, agent: AgentAdapter):
+        super().__init__(agent)
+        self.posted = []
+
+    async def send_notification(self, url: str, event: str, payload: bytes):
+        # Slow posts, so later events queue up behind earlier ones
+        await asyncio.sleep(0.01)
+        self.posted.append(json.loads(payload))
+
+
+def _send(manager: A2aMinSubscribeTaskManager, task_id: str):
+    return manager.on_send_task(
+        SendTaskRequest(
+            params=TaskSendParams(
+                id=task_id,
+                sessionId="session",
+                message=Message(role="user", parts=[TextPart(text="hello")]),
+                pushNotification=PushNotificationConfig(url="http://client/notify"),
+            )
+        )
+    )
+
+
+def test_notifications_are_posted_in_order_and_forgotten():
+    manager = RecordingTaskManager(ReportingAgent())
+
+    async def scenario():
+        await asyncio.gather(_send(manager, "task-1"), _send(manager, "task-2"))
+        deadline = asyncio.get_running_loop().time() + 5
+        while len(manager.posted) < 8 and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    for task_id in ("task-1", "task-2"):
+        posted = [n for n in manager.posted if n["id"] == task_id]
+        assert [n["seq"] for n in posted] == [0, 1, 2, 3]
+        assert [n["event"] for n in posted] == ["step", "step", "step", "completed"]
+        assert posted[-1]["artifact"]["parts"][0]["text"] == "hello"
+    assert manager.notification_seqs == {}
+    assert manager.notification_locks == {}
+
+
+def test_input_required_keeps_the_sequence_going():
+    manager = RecordingTaskManager(ReportingAgent())
+    manager.push_notification_infos["task-1"] = PushNotificationConfig(url="http://client/notify")
+
+    async def scenario():
+        manager.schedule_notification("task-1", "input_required", {})
+        # The task is resumed with the user's answer
+        manager.schedule_notification("task-1", "completed", {})
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+    assert [n["seq"] for n in manager.posted] == [0, 1]
+    assert manager.notification_seqs == {}
+
+
+def test_events_reported_after_the_final_one_are_dropped():
+    manager = RecordingTaskManager(LateReportingAgent())
+
+    async def scenario():
+        await _send(manager, "task-1")
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    assert [(n["seq"], n["event"]) for n in manager.posted] == [(0, "search_started"), (1, "completed")]
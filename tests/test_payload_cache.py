@@ -0,0 +1,75 @@
+from a2a_min.base.types import (
+    Artifact,
+    Task,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from a2a_min_payload_cache import SerializedPayloadCache, dumps
+from a2a_min_subscribe_server import A2AMinSubscribeServer
+from sample_a2a_server import EchoAgent
+
+from starlette.testclient import TestClient
+
+
+def _task(task_id: str, state: TaskState = TaskState.COMPLETED) -> Task:
+    return Task(
+        id=task_id,
+        sessionId="session",
+        status=TaskStatus(state=state),
+        artifacts=[Artifact(parts=[TextPart(text="riddle")])],
+    )
+
+
+def _rpc(method: str, params: dict) -> dict:
+    return {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+
+
+def test_payloads_are_serialized_once_per_completed_task():
+    cache = SerializedPayloadCache()
+    task = _task("task-1")
+    assert cache.task_bytes(task) == cache.task_bytes(task) == dumps(task)
+    assert cache.artifact_bytes(task, 0) == cache.artifact_bytes(task, 0) == dumps(task.artifacts[0])
+    assert (cache.misses, cache.hits) == (2, 2)
+
+    # Tasks that may still change are never cached
+    working = _task("task-2", TaskState.WORKING)
+    cache.task_bytes(working)
+    cache.task_bytes(working)
+    assert (cache.misses, cache.hits) == (2, 2)
+
+
+def test_least_recently_used_tasks_are_evicted():
+    cache = SerializedPayloadCache(max_tasks=2)
+    for task_id in ("task-1", "task-2", "task-1", "task-3"):
+        cache.task_bytes(_task(task_id))
+    assert list(cache._entries) == ["task-1", "task-3"]
+
+
+def test_get_after_an_update_returns_the_new_state():
+    server = A2AMinSubscribeServer.from_agent(EchoAgent(), block_without_push=True)._server
+    manager = server.task_manager
+    send = _rpc(
+        "tasks/send",
+        {"id": "task-1", "sessionId": "session", "message": {"role": "user", "parts": [{"type": "text", "text": "hi"}]}},
+    )
+    get = _rpc("tasks/get", {"id": "task-1"})
+
+    with TestClient(server.app) as client:
+        assert client.post("/", json=send).json()["result"]["status"]["state"] == "completed"
+        first = client.post("/", json=get).json()["result"]
+        assert client.post("/", json=get).json()["result"] == first
+        assert manager.payload_cache.hits == 1
+
+        # The task gets another artifact after its payload was cached
+        client.portal.call(
+            manager.update_store,
+            "task-1",
+            TaskStatus(state=TaskState.COMPLETED),
+            [Artifact(parts=[TextPart(text="more")])],
+        )
+        updated = client.post("/", json=get).json()["result"]
+        assert [a["parts"][0]["text"] for a in updated["artifacts"]] == ["Echo: hi", "more"]
+
+        client.portal.call(manager.update_store, "task-1", TaskStatus(state=TaskState.FAILED), None)
+        assert client.post("/", json=get).json()["result"]["status"]["state"] == "failed"
@@ -0,0 +1,91 @@
+from rate_limiter import AdaptiveRateLimiter, RateLimitTimeout, TokenBucket, estimate_tokens
+
+import asyncio
+import threading
+
+import pytest
+
+
+def test_bucket_refills_up_to_a_minutes_worth():
+    bucket = TokenBucket(per_minute=60)
+    bucket.take(60)
+    assert bucket.time_until(2) == pytest.approx(2)
+    bucket.refill(bucket.updated + 1)
+    assert bucket.level == pytest.approx(1)
+    bucket.refill(bucket.updated + 3600)
+    assert bucket.level == 60
+    # Requests larger than the bucket wait for a full bucket rather than forever
+    assert bucket.time_until(1000) == 0
+
+
+def test_calls_beyond_the_concurrency_limit_wait():
+    limiter = AdaptiveRateLimiter("test", requests_per_minute=6000, max_concurrency=1)
+    first = limiter.acquire()
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(timeout=0.05)
+
+    admitted = threading.Event()
+    waiter = threading.Thread(target=lambda: limiter.acquire(timeout=5) and admitted.set())
+    waiter.start()
+    limiter.release(first)
+    waiter.join(5)
+    assert admitted.is_set()
+    assert limiter.in_flight == 1
+
+
+def test_small_calls_dont_overtake_a_large_one():
+    limiter = AdaptiveRateLimiter("test", requests_per_minute=6000, tokens_per_minute=600)
+    limiter.release(limiter.acquire(tokens=590))
+
+    async def scenario():
+        # Needs about 9s of refills, the small call queued behind it has to wait as well
+        large = asyncio.create_task(limiter.acquire_async(tokens=100))
+        await asyncio.sleep(0.01)
+        with pytest.raises(RateLimitTimeout):
+            await limiter.acquire_async(tokens=5, timeout=0.1)
+        large.cancel()
+        await asyncio.gather(large, return_exceptions=True)
+        # Once the large call gave up, the small one is admitted right away
+        return await limiter.acquire_async(tokens=5, timeout=0.1)
+
+    permit = asyncio.run(scenario())
+    assert permit.tokens == 5
+    assert limiter.in_flight == 1
+    assert len(limiter._queue) == 0
+
+
+def test_concurrency_limit_is_halved_on_throttling_and_grows_back():
+    limiter = AdaptiveRateLimiter(
+        "test", requests_per_minute=6000, max_concurrency=8, backoff_interval_s=60
+    )
+    for _ in range(2):
+        permit = limiter.acquire()
+        permit.failed(throttled=True)
+        limiter.release(permit)
+    # The second throttled call came within the backoff interval
+    assert limiter.concurrency_limit == 4
+    assert limiter.throttled_calls == 2
+
+    for _ in range(4):
+        permit = limiter.acquire()
+        permit.ok()
+        limiter.release(permit)
+    assert 4.9 < limiter.concurrency_limit < 5
+
+
+def test_slow_calls_count_as_overload():
+    limiter = AdaptiveRateLimiter(
+        "test", requests_per_minute=6000, max_concurrency=8, target_latency_s=0.01
+    )
+    with limiter.limit() as permit:
+        threading.Event().wait(0.05)
+        permit.ok()
+    assert limiter.concurrency_limit == 4
+
+
+def test_actual_usage_corrects_the_estimate():
+    limiter = AdaptiveRateLimiter("test", requests_per_minute=6000, tokens_per_minute=1000)
+    with limiter.limit(tokens=estimate_tokens("x" * 400, completion_tokens=100)) as permit:
+        assert permit.tokens == 200
+        permit.ok(actual_tokens=500)
+    assert limiter.tokens.level == pytest.approx(500, abs=1)
@@ -0,0 +1,79 @@
+from a2a_min import AgentAdapter, AgentInvocationResult
+from a2a_min.base.types import (
+    CancelTaskRequest,
+    Message,
+    SendTaskStreamingRequest,
+    TaskSendParams,
+    TaskState,
+    TextPart,
+)
+from a2a_min_subscribe_task_manager import A2aMinSubscribeTaskManager
+from news_riddle_client import AINewsRiddleClient
+
+import asyncio
+
+
+class SlowStreamAgent(AgentAdapter):
+    def invoke(self, query: str, session_id: str) -> AgentInvocationResult:
+        return AgentInvocationResult.agent_msg(query)
+
+    async def stream(self, query: str, session_id: str):
+        started = AgentInvocationResult.agent_msg("started")
+        started.is_complete = False
+        yield started
+        await asyncio.sleep(60)
+
+
+class InProcessClient:
+    """Answers cancel requests from a task manager, without a server in between."""
+
+    def __init__(self, manager: A2aMinSubscribeTaskManager):
+        self.manager = manager
+        self.cancel_requests = 0
+
+    async def cancel_task(self, payload):
+        self.cancel_requests += 1
+        return await self.manager.on_cancel_task(CancelTaskRequest(params=payload))
+
+
+def _cancel_before_the_task_arrives(wait_for_task_s: float):
+    manager = A2aMinSubscribeTaskManager(SlowStreamAgent())
+    transport = InProcessClient(manager)
+    client = AINewsRiddleClient(transport)
+
+    async def send_late():
+        # The send request is still on its way when the cancel is sent
+        await asyncio.sleep(0.2)
+        request = SendTaskStreamingRequest(
+            params=TaskSendParams(
+                id="task-1",
+                sessionId="session",
+                message=Message(role="user", parts=[TextPart(text="hello")]),
+            )
+        )
+        events = await manager.on_send_task_subscribe(request)
+        return [event async for event in events]
+
+    async def scenario():
+        sending = asyncio.create_task(send_late())
+        task = await client.cancel_task("task-1", wait_for_task_s=wait_for_task_s)
+        if task is None:
+            sending.cancel()
+            return task, []
+        return task, await asyncio.wait_for(sending, 5)
+
+    task, events = asyncio.run(scenario())
+    return task, events, transport.cancel_requests
+
+
+def test_cancel_waits_for_the_task_to_arrive():
+    task, events, cancel_requests = _cancel_before_the_task_arrives(wait_for_task_s=1.0)
+    assert task.status.state == TaskState.CANCELED
+    assert events[-1].result.status.state == TaskState.CANCELED
+    assert cancel_requests > 1
+
+
+def test_cancel_without_waiting_gives_up_on_unknown_tasks():
+    task, _, cancel_requests = _cancel_before_the_task_arrives(wait_for_task_s=0.0)
+    assert task is None
+    assert cancel_requests == 1
@@ -0,0 +1,28 @@
+from riddle_topics import asks_for_riddle, guess_topic, same_topic, topic_words
+
+import pytest
+
+
+def test_topic_words_drop_stopwords_and_keep_technical_terms():
+    assert topic_words("Give me a riddle about C#/Node.js and GPT-4, please!") == ["c", "node.js", "gpt-4"]
+
+
+def test_guess_topic_only_for_riddle_requests():
+    assert asks_for_riddle("Can you make an AI puzzle?")
+    assert guess_topic("Give me a riddle about the latest news about Arsenal") == "latest news arsenal"
+    assert guess_topic("What's the weather in London?") == ""
+
+
+@pytest.mark.parametrize(
+    "topic, guess, same",
+    [
+        ("Arsenal", "latest news arsenal", True),
+        ("Large language models", "language models", True),
+        ("OpenAI", "openai", True),
+        ("Reinforcement learning", "robotics", False),
+        ("", "robotics", False),
+        ("Robotics", "", False),
+    ],
+)
+def test_same_topic_by_containment(topic, guess, same):
+    assert same_topic(topic, guess) is same
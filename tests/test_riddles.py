@@ -0,0 +1,87 @@
+from a2a_min.base.types import DataPart
+from news_riddle_models import AINewsHeadlines, AINewsRiddle
+from news_riddle_server import AINewsRiddleAgentAdapter, parse_riddles, riddle_result
+from pydantic import ValidationError
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+RIDDLES = AINewsRiddle(
+    riddles=["I learn without a teacher", "I speak in tokens"],
+    answers=["Unsupervised learning", "A language model"],
+    hints=["No labels", "Next word"],
+)
+
+
+class RiddleCrew:
+    """Reports its task outputs like a crew and returns the riddles as raw JSON."""
+
+    def __init__(self, task_callback):
+        self.task_callback = task_callback
+
+    def kickoff(self, inputs):
+        headlines = AINewsHeadlines(headlines=["News"], descriptions=["..."], dates=["today"])
+        self.task_callback(SimpleNamespace(pydantic=headlines))
+        self.task_callback(SimpleNamespace(pydantic=RIDDLES))
+        return SimpleNamespace(pydantic=None, raw=RIDDLES.model_dump_json())
+
+
+class RiddleAgent:
+    def __init__(self):
+        self.llm = SimpleNamespace(stream=False)
+
+    def build_crew(self, task_callback=None, guard=None):
+        return RiddleCrew(task_callback)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"riddles": ["a", "b"], "answers": ["a"], "hints": ["a", "b"]},
+        {"riddles": ["a"], "answers": ["a"], "hints": []},
+    ],
+)
+def test_mismatched_riddles_answers_and_hints_are_rejected(payload):
+    with pytest.raises(ValidationError, match="riddles, .* answers and .* hints"):
+        AINewsRiddle.model_validate(payload)
+
+
+def test_riddles_are_parsed_from_the_pydantic_output_or_the_raw_json():
+    assert parse_riddles(SimpleNamespace(pydantic=RIDDLES, raw="")) is RIDDLES
+    assert parse_riddles(SimpleNamespace(pydantic=None, raw=RIDDLES.model_dump_json())) == RIDDLES
+    mismatched = '{"riddles": ["a"], "answers": [], "hints": ["a"]}'
+    with pytest.raises(ValidationError):
+        parse_riddles(SimpleNamespace(pydantic=None, raw=mismatched))
+
+
+def test_result_is_a_single_data_part_marked_when_degraded():
+    parts = riddle_result(RIDDLES, "cached").message.parts
+    assert len(parts) == 1
+    assert isinstance(parts[0], DataPart)
+    assert parts[0].data == RIDDLES.model_dump()
+    assert parts[0].metadata == {"degraded": "cached"}
+    assert riddle_result(RIDDLES).message.parts[0].metadata is None
+
+
+def test_stream_yields_one_riddle_per_update_then_all_of_them():
+    adapter = AINewsRiddleAgentAdapter(crew_startup="lazy")
+    adapter._agent = RiddleAgent()
+
+    async def scenario():
+        return [result async for result in adapter.stream("machine learning", "session")]
+
+    results = asyncio.run(scenario())
+    assert [result.is_complete for result in results] == [False, False, True]
+    for index, result in enumerate(results[:-1]):
+        (part,) = result.message.parts
+        assert part.data == {
+            "riddles": [RIDDLES.riddles[index]],
+            "answers": [RIDDLES.answers[index]],
+            "hints": [RIDDLES.hints[index]],
+        }
+    (part,) = results[-1].message.parts
+    assert part.data == RIDDLES.model_dump()
+    assert adapter._agent.llm.stream
+    assert adapter.recent_riddles.get("machine learning") == RIDDLES
@@ -0,0 +1,25 @@
+from news_riddle_server import AINewsRiddleAgentAdapter
+
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def test_server_module_doesnt_import_the_agent_stack():
+    check = "import sys, news_riddle_server; assert 'crewai' not in sys.modules, 'crewai was imported'"
+    env = dict(os.environ, PYTHONPATH=SRC)
+    result = subprocess.run(
+        [sys.executable, "-c", check], env=env, cwd=SRC, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_agent_card_of_a_lazy_adapter_doesnt_build_the_agent():
+    adapter = AINewsRiddleAgentAdapter(crew_startup="lazy")
+    card = adapter.get_agent_card("http://localhost:8001/")
+    assert card.name == "AINewsRiddleAgentAdapter"
+    assert card.url == "http://localhost:8001/"
+    assert card.capabilities.streaming
+    assert adapter._agent is None
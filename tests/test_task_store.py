@@ -0,0 +1,151 @@
+from a2a_min import AgentAdapter, AgentInvocationResult
+from a2a_min.base.types import (
+    CancelTaskRequest,
+    GetTaskRequest,
+    Message,
+    PushNotificationConfig,
+    SendTaskRequest,
+    SendTaskStreamingRequest,
+    Task,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from a2a_min_subscribe_task_manager import A2aMinSharedSubscribeTaskManager, TaskRun
+from a2a_min_task_store import SqliteTaskStore
+
+import asyncio
+
+
+class WaitingAgent(AgentAdapter):
+    """Works on a task until it is cancelled."""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def invoke(self, query: str, session_id: str) -> AgentInvocationResult:
+        return AgentInvocationResult.agent_msg(query)
+
+    async def invoke_task(self, query: str, session_id: str, run: TaskRun) -> AgentInvocationResult:
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            self.cancelled = run.cancelled
+            raise
+        return AgentInvocationResult.agent_msg(query)
+
+    async def stream(self, query: str, session_id: str):
+        started = AgentInvocationResult.agent_msg("started")
+        started.is_complete = False
+        yield started
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        yield AgentInvocationResult.agent_msg(query)
+
+
+def _send_request(task_id: str) -> SendTaskRequest:
+    return SendTaskRequest(
+        params=TaskSendParams(
+            id=task_id,
+            sessionId="session",
+            message=Message(role="user", parts=[TextPart(text="hello")]),
+        )
+    )
+
+
+async def _collect(events) -> list:
+    return [event async for event in events]
+
+
+def test_store_versions_tasks_and_keeps_configs_and_cancel_requests(tmp_path):
+    store = SqliteTaskStore(str(tmp_path / "tasks.sqlite3"))
+    task = Task(id="task-1", sessionId="session", status=TaskStatus(state=TaskState.WORKING))
+    assert store.put_task(task) == 1
+    task.status = TaskStatus(state=TaskState.COMPLETED)
+    assert store.put_task(task) == 2
+
+    stored, version = store.get_task("task-1")
+    assert (stored.status.state, version) == (TaskState.COMPLETED, 2)
+    assert store.get_task("task-2") is None
+    assert store.has_task("task-1") and not store.has_task("task-2")
+
+    store.put_push_config("task-1", PushNotificationConfig(url="http://client/notify"))
+    # Another worker reads through its own store object
+    other = SqliteTaskStore(store.path)
+    assert other.get_push_config("task-1").url == "http://client/notify"
+    assert not other.cancel_requested("task-1")
+    store.request_cancel("task-1")
+    assert other.cancel_requested("task-1")
+
+
+def test_cancel_sent_to_another_worker_stops_the_run(tmp_path):
+    path = str(tmp_path / "tasks.sqlite3")
+    agent = WaitingAgent()
+    owner = A2aMinSharedSubscribeTaskManager(agent, SqliteTaskStore(path), block_without_push=True)
+    owner.cancel_poll_interval = 0.05
+    other = A2aMinSharedSubscribeTaskManager(WaitingAgent(), SqliteTaskStore(path))
+
+    async def scenario():
+        sending = asyncio.create_task(owner.on_send_task(_send_request("task-1")))
+        while "task-1" not in owner.runs:
+            await asyncio.sleep(0.01)
+        polled = await other.on_get_task(GetTaskRequest(params={"id": "task-1"}))
+        cancelled = await other.on_cancel_task(CancelTaskRequest(params={"id": "task-1"}))
+        sent = await asyncio.wait_for(sending, 5)
+        after = await other.on_get_task(GetTaskRequest(params={"id": "task-1"}))
+        return polled, cancelled, sent, after
+
+    polled, cancelled, sent, after = asyncio.run(scenario())
+    assert polled.result.status.state == TaskState.WORKING
+    assert cancelled.error is None
+    assert agent.cancelled
+    assert sent.result.status.state == TaskState.CANCELED
+    assert after.result.status.state == TaskState.CANCELED
+    assert owner.cancelled_runs == {"tasks/cancel": 1}
+
+
+def test_cancel_sent_to_another_worker_stops_the_stream(tmp_path):
+    path = str(tmp_path / "tasks.sqlite3")
+    agent = WaitingAgent()
+    owner = A2aMinSharedSubscribeTaskManager(agent, SqliteTaskStore(path))
+    owner.cancel_poll_interval = 0.05
+    other = A2aMinSharedSubscribeTaskManager(WaitingAgent(), SqliteTaskStore(path))
+
+    async def scenario():
+        request = SendTaskStreamingRequest(params=_send_request("task-1").params)
+        events = await owner.on_send_task_subscribe(request)
+        await events.__anext__()
+        cancelled = await other.on_cancel_task(CancelTaskRequest(params={"id": "task-1"}))
+        remaining = await asyncio.wait_for(_collect(events), 5)
+        await asyncio.sleep(0.1)
+        after = await other.on_get_task(GetTaskRequest(params={"id": "task-1"}))
+        return cancelled, remaining, after, agent.cancelled
+
+    cancelled, remaining, after, agent_cancelled = asyncio.run(scenario())
+    assert cancelled.error is None
+    assert agent_cancelled
+    assert remaining[-1].result.final
+    assert remaining[-1].result.status.state == TaskState.CANCELED
+    assert after.result.status.state == TaskState.CANCELED
+    assert owner.cancelled_runs == {"tasks/cancel": 1}
+
+
+def test_finished_tasks_of_another_worker_cant_be_cancelled(tmp_path):
+    path = str(tmp_path / "tasks.sqlite3")
+    store = SqliteTaskStore(path)
+    store.put_task(Task(id="task-1", sessionId="session", status=TaskStatus(state=TaskState.COMPLETED)))
+    other = A2aMinSharedSubscribeTaskManager(WaitingAgent(), SqliteTaskStore(path))
+
+    async def scenario():
+        finished = await other.on_cancel_task(CancelTaskRequest(params={"id": "task-1"}))
+        unknown = await other.on_cancel_task(CancelTaskRequest(params={"id": "task-2"}))
+        return finished, unknown
+
+    finished, unknown = asyncio.run(scenario())
+    assert finished.error.code == -32002
+    assert unknown.error.code == -32001
+    assert not store.cancel_requested("task-1")
@@ -0,0 +1,90 @@
+from trace_report import breakdown, critical_path, load_spans, root_span
+from tracing import JsonlSpanExporter, SpanContext, Tracer, extract, inject
+
+import json
+import os
+import time
+
+
+def _read(path) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def _span(name, span_id, parent_id, start, end, trace_id="t1") -> dict:
+    return {
+        "trace_id": trace_id,
+        "span_id": span_id,
+        "parent_id": parent_id,
+        "name": name,
+        "service": "test",
+        "start": start,
+        "duration": end - start,
+        "status": "ok",
+    }
+
+
+def test_idle_exporter_writes_its_last_spans(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonlSpanExporter(str(path), flush_interval_s=0.1)
+    exporter.export({"name": "last"})
+
+    deadline = time.monotonic() + 5
+    while not _read(path) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert [record["name"] for record in _read(path)] == ["last"]
+
+
+def test_forked_child_does_not_write_the_parents_spans(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonlSpanExporter(str(path), flush_interval_s=0.1)
+    exporter.export({"name": "parent"})
+
+    pid = os.fork()
+    if pid == 0:
+        exporter.export({"name": "child"})
+        # Wait for the child's own flusher, the child never runs its atexit handlers
+        time.sleep(0.5)
+        os._exit(0)
+    os.waitpid(pid, 0)
+    exporter.flush()
+    assert sorted(record["name"] for record in _read(path)) == ["child", "parent"]
+
+
+def test_trace_context_round_trip(tmp_path):
+    tracer = Tracer("test", JsonlSpanExporter(str(tmp_path / "traces.jsonl")), sample_rate=1.0)
+    with tracer.span("outer") as span:
+        metadata = inject({})
+    assert extract(metadata) == SpanContext(span.trace_id, span.span_id, True)
+    assert extract({"traceparent": "garbage"}) is None
+
+
+def test_critical_path_follows_the_child_that_finished_last():
+    spans = [
+        # The root's parent is a span of another service that wasn't recorded
+        _span("root", "r", "remote", 0, 10),
+        _span("a", "a", "r", 1, 4),
+        _span("b", "b", "r", 3, 9),
+        _span("c", "c", "b", 5, 8),
+    ]
+    assert root_span(spans)["span_id"] == "r"
+
+    path = [(span["name"], seconds) for span, seconds in critical_path(spans)]
+    # "a" only counts until "b" started
+    assert path == [("root", 1), ("a", 2), ("b", 2), ("c", 3), ("b", 1), ("root", 1)]
+    assert breakdown([spans]) == {"b": 3, "c": 3, "root": 2, "a": 2}
+
+
+def test_load_spans_skips_cut_lines_and_filters_by_start(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    with open(path, "w") as f:
+        for span in (
+            _span("early", "e", None, 0, 1, trace_id="early"),
+            _span("late", "l", None, 100, 101, trace_id="late"),
+        ):
+            f.write(json.dumps(span) + "\n")
+        f.write('{"trace_id": "cut')
+
+    assert list(load_spans(str(path), 50, 150)) == ["late"]
@@ -0,0 +1,94 @@
+from a2a_min.base.client.client import A2AClient
+from a2a_min.base.types import Message, TaskSendParams, TaskState, TaskQueryParams, TextPart
+from a2a_min_subscribe_server import A2AMinSubscribeServer
+from a2a_min_task_store import SqliteTaskStore
+from a2a_min_workers import serve_workers
+from sample_a2a_server import EchoAgent, build_shared_server
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+import httpx
+import pytest
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_serving(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}.well-known/agent.json").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"Workers didn't start serving on {url}")
+
+
+def _serve_echo(store_path: str, port: int) -> None:
+    store = SqliteTaskStore(store_path)
+    serve_workers(lambda: build_shared_server(store, "127.0.0.1", port), "127.0.0.1", port, 2)
+
+
+def _serve_subscribe_echo(store_path: str, port: int) -> None:
+    A2AMinSubscribeServer.start_workers(
+        EchoAgent,
+        workers=2,
+        host="127.0.0.1",
+        port=port,
+        block_without_push=True,
+        store_path=store_path,
+    )
+
+
+@pytest.mark.parametrize("serve", [_serve_echo, _serve_subscribe_echo])
+def test_two_workers_serve_tasks_from_a_shared_store(tmp_path, serve):
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/"
+    parent = multiprocessing.get_context("fork").Process(
+        target=serve, args=(str(tmp_path / "tasks.sqlite3"), port)
+    )
+    parent.start()
+    try:
+        _wait_until_serving(url)
+
+        async def run():
+            client = A2AClient(url=url)
+            responses = []
+            for i in range(4):
+                params = TaskSendParams(
+                    id=f"task-{i}",
+                    sessionId="session",
+                    message=Message(role="user", parts=[TextPart(text=f"hello {i}")]),
+                )
+                responses.append(await client.send_task(params))
+            # Each request may land on either worker, the store answers for the other one
+            fetched = [
+                await client.get_task(TaskQueryParams(id=f"task-{i}")) for i in range(4)
+            ]
+            return responses, fetched
+
+        responses, fetched = asyncio.run(run())
+    finally:
+        # The parent terminates its workers on KeyboardInterrupt
+        os.kill(parent.pid, signal.SIGINT)
+        parent.join(10)
+        if parent.is_alive():
+            parent.kill()
+
+    for i, response in enumerate(responses):
+        assert response.error is None
+        assert response.result.status.state == TaskState.COMPLETED
+        assert response.result.artifacts[-1].parts[0].text == f"Echo: hello {i}"
+    for response in fetched:
+        assert response.error is None
+        assert response.result.status.state == TaskState.COMPLETED